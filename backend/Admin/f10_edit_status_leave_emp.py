@@ -1,60 +1,68 @@
-import sqlite3
+import os
+import sys
 
-# Connect to DB
-conn = sqlite3.connect("leave_management_system.db")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from db import pool
+from leaves import set_status
+
+# Borrow a connection from the shared pool
+conn = pool.acquire()
 cursor = conn.cursor()
 
 # Ask admin for Employee ID
 emp_id = input("Enter Employee ID to approve/reject leave: ").strip()
 
-# Fetch pending leave for this employee
+# Fetch pending leaves for this employee
 cursor.execute("""
 SELECT l.leave_id, e.name, e.position, e.department, e.phone, l.leave_days, l.reason, l.status
 FROM employees e
 JOIN leaves l ON e.id = l.employee_id
 WHERE e.id = ? AND l.status = 'Pending'
+ORDER BY l.leave_id
 """, (emp_id,))
 
-leave_record = cursor.fetchone()
+leave_records = cursor.fetchall()
 
-if not leave_record:
+if not leave_records:
     print(f"No pending leave found for Employee ID: {emp_id}")
 else:
-    leave_id, name, position, department, phone, leave_days, reason, status = leave_record
+    _, name, position, department, phone, _, _, _ = leave_records[0]
     print("\nPending Leave Details:")
     print("-" * 80)
     print(f"Name: {name}")
     print(f"Position: {position}")
     print(f"Department: {department}")
     print(f"Phone: {phone}")
-    print(f"Leave Days: {leave_days}")
-    print(f"Reason: {reason}")
-    print(f"Status: {status}")
-
-    # Ask admin for action
-    action = input("\nDo you want to Approve or Reject this leave? (A/R): ").strip().upper()
-    if action == "A":
-        new_status = "Approved"
-        returned = "No"  # once approved, leave is active
-        cursor.execute("""
-        UPDATE leaves
-        SET status = ?, returned = ?
-        WHERE leave_id = ?
-        """, (new_status, returned, leave_id))
-        conn.commit()
-        print(f"\nLeave for {name} has been APPROVED.")
-    elif action == "R":
-        new_status = "Rejected"
-        returned = "Yes"
-        cursor.execute("""
-        UPDATE leaves
-        SET status = ?, returned = ?
-        WHERE leave_id = ?
-        """, (new_status, returned, leave_id))
-        conn.commit()
-        print(f"\nLeave for {name} has been REJECTED.")
+    for leave_id, _, _, _, _, leave_days, reason, status in leave_records:
+        print(f"Leave ID: {leave_id}, Leave Days: {leave_days}, Reason: {reason}, Status: {status}")
+
+    # Ask admin which leaves to act on; the action applies to all of them in one transaction
+    pending_ids = [record[0] for record in leave_records]
+    if len(pending_ids) == 1:
+        selected = pending_ids
+    else:
+        choice = input("\nEnter Leave ID(s) to update, comma-separated, or 'all': ").strip().lower()
+        if choice == "all":
+            selected = pending_ids
+        else:
+            try:
+                selected = list(dict.fromkeys(int(value) for value in choice.split(",") if value.strip()))
+            except ValueError:
+                selected = []
+            if not selected or any(leave_id not in pending_ids for leave_id in selected):
+                selected = None
+
+    if selected is None:
+        print("Invalid Leave ID(s). No changes made.")
     else:
-        print("Invalid input. No changes made.")
+        noun = "this leave" if len(selected) == 1 else f"these {len(selected)} leaves"
+        action = input(f"\nDo you want to Approve or Reject {noun}? (A/R): ").strip().upper()
+        if action in ("A", "R"):
+            new_status = "Approved" if action == "A" else "Rejected"
+            set_status(conn, new_status, selected)
+            print(f"\n{len(selected)} leave(s) for {name} {'APPROVED' if action == 'A' else 'REJECTED'}.")
+        else:
+            print("Invalid input. No changes made.")
 
-# Close connection
-conn.close()
+# Return connection to the pool
+pool.release(conn)
@@ -1,24 +1,15 @@
-import sqlite3
-from datetime import datetime
+import os
+import sys
 
-# Connect to DB
-conn = sqlite3.connect("leave_management_system.db")
-cursor = conn.cursor()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import reports
+from db import pool
 
-# Today's date
-today = datetime.today().date()
+# Borrow a connection from the shared pool
+conn = pool.acquire()
 
-# Fetch employees currently on leave
-query = """
-SELECT e.name, e.position, e.department, e.phone, l.reason, l.end_date
-FROM employees e
-JOIN leaves l ON e.id = l.employee_id
-WHERE l.status = 'Approved' AND l.returned = 'No'
-ORDER BY l.end_date
-"""
-
-cursor.execute(query)
-on_leave = cursor.fetchall()
+# Fetch employees currently on leave, soonest return first
+on_leave = reports.on_leave(conn)
 
 # Print header
 print("Employees Currently On Leave with Expected Return Date:", len(on_leave))
@@ -26,8 +17,7 @@ print("-" * 100)
 
 # Print details
 for emp in on_leave:
-    name, position, department, phone, reason, end_date = emp
-    print(f"Name: {name}, Position: {position}, Department: {department}, Phone: {phone}, Reason: {reason}, Expected Return: {end_date}")
+    print(f"Name: {emp['name']}, Position: {emp['position']}, Department: {emp['department']}, Phone: {emp['phone']}, Reason: {emp['reason']}, Expected Return: {emp['end_date']}")
 
-# Close connection
-conn.close()
+# Return connection to the pool
+pool.release(conn)
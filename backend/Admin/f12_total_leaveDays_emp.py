@@ -1,19 +1,15 @@
-import sqlite3
+import os
+import sys
 
-# Connect to DB
-conn = sqlite3.connect("leave_management_system.db")
-cursor = conn.cursor()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import reports
+from db import pool
 
-# Fetch leave records with employee info
-query = """
-SELECT e.name, e.position, e.department, l.leave_id, l.reason, l.leave_days
-FROM employees e
-JOIN leaves l ON e.id = l.employee_id
-ORDER BY e.id, l.start_date
-"""
+# Borrow a connection from the shared pool
+conn = pool.acquire()
 
-cursor.execute(query)
-leaves = cursor.fetchall()
+# Fetch leave records with employee info
+leaves = reports.leave_history(conn)
 
 # Print header
 print("Employee Leave Details:")
@@ -22,9 +18,14 @@ print("-" * 100)
 # Track leave number per employee
 leave_count = {}
 for leave in leaves:
-    name, position, department, leave_id, reason, leave_days = leave
-    leave_count[name] = leave_count.get(name, 0) + 1
-    print(f"Name: {name}, Position: {position}, Department: {department}, Leave #{leave_count[name]}, Reason: {reason}, Leave Days: {leave_days}")
+    leave_count[leave['id']] = leave_count.get(leave['id'], 0) + 1
+    print(f"Name: {leave['name']}, Position: {leave['position']}, Department: {leave['department']}, Leave #{leave_count[leave['id']]}, Reason: {leave['reason']}, Leave Days: {leave['leave_days']}")
+
+# Totals per employee
+print("\nTotal Leave Days per Employee:")
+print("-" * 100)
+for emp in reports.leave_days_by_employee(conn):
+    print(f"Name: {emp['name']}, Department: {emp['department']}, Leaves: {emp['leaves']}, Total Days: {emp['leave_days']}")
 
-# Close connection
-conn.close()
+# Return connection to the pool
+pool.release(conn)
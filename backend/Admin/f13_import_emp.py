@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from db import pool
+from employee_import import ImportAborted, ImportFileError, import_employees, parse_file
+
+# File to import: CSV with a header row, or a JSON list of employees
+path = sys.argv[1] if len(sys.argv) > 1 else input("Path to CSV/JSON file: ").strip()
+fmt = 'csv' if path.lower().endswith('.csv') else 'json'
+
+with open(path, encoding='utf-8-sig') as f:
+    try:
+        rows = parse_file(f.read(), fmt)
+    except ImportFileError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+# Borrow a connection from the shared pool
+conn = pool.acquire()
+
+started = time.perf_counter()
+try:
+    results = import_employees(conn, rows)
+except ImportAborted as e:
+    # Nothing was written; the per-row report below says why
+    print(f"Error: {e}")
+    results = e.results
+elapsed = time.perf_counter() - started
+
+created = [r for r in results if r['status'] == 'created']
+print(f"Imported {len(created)} of {len(results)} employees in {elapsed:.1f}s")
+print("-" * 80)
+
+# Print per-row results
+for r in results:
+    if r['status'] == 'created':
+        print(f"Row {r['row']}: Employee ID: {r['id']}, Username: {r['username']}, Password: {r['password']}")
+    else:
+        print(f"Row {r['row']}: ERROR {r['error']}")
+
+# Return connection to the pool
+pool.release(conn)
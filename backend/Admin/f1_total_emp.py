@@ -1,12 +1,15 @@
-import sqlite3
+import os
+import sys
 
-# Connect to SQLite DB
-conn = sqlite3.connect("leave_management_system.db")
-cursor = conn.cursor()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import reports
+from db import pool
+
+# Borrow a connection from the shared pool
+conn = pool.acquire()
 
 # Fetch all employees
-cursor.execute("SELECT name, position, department, phone, email FROM employees")
-employees = cursor.fetchall()
+employees = reports.all_employees(conn)
 
 # Print header
 print("Total Employees in Company:", len(employees))
@@ -14,8 +17,7 @@ print("-" * 80)
 
 # Print employee details
 for emp in employees:
-    name, position, department, phone, email = emp
-    print(f"Name: {name}, Position: {position}, Department: {department}, Phone: {phone}, Email: {email}")
+    print(f"Name: {emp['name']}, Position: {emp['position']}, Department: {emp['department']}, Phone: {emp['phone']}, Email: {emp['email']}")
 
-# Close connection
-conn.close()
+# Return connection to the pool
+pool.release(conn)
@@ -1,19 +1,15 @@
-import sqlite3
+import os
+import sys
 
-# Connect to SQLite DB
-conn = sqlite3.connect("leave_management_system.db")
-cursor = conn.cursor()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import reports
+from db import pool
 
-# Join employees & leaves to get current leave info
-query = """
-SELECT e.name, e.position, l.start_date, l.end_date, l.applied_on, l.reason
-FROM employees e
-JOIN leaves l ON e.id = l.employee_id
-WHERE l.status = 'Approved' AND l.returned = 'No'
-ORDER BY l.start_date
-"""
-cursor.execute(query)
-on_leave = cursor.fetchall()
+# Borrow a connection from the shared pool
+conn = pool.acquire()
+
+# Employees with approved leave who have not returned yet
+on_leave = reports.on_leave(conn)
 
 # Print header
 print("Employees Currently On Leave:", len(on_leave))
@@ -21,8 +17,7 @@ print("-" * 80)
 
 # Print leave details
 for row in on_leave:
-    name, position, start_date, end_date, applied_on, reason = row
-    print(f"Name: {name}, Position: {position}, Start: {start_date}, End: {end_date}, Applied On: {applied_on}, Reason: {reason}")
+    print(f"Name: {row['name']}, Position: {row['position']}, Start: {row['start_date']}, End: {row['end_date']}, Applied On: {row['applied_on']}, Reason: {row['reason']}")
 
-# Close connection
-conn.close()
+# Return connection to the pool
+pool.release(conn)
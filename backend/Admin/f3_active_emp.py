@@ -1,27 +1,15 @@
-import sqlite3
-from datetime import datetime
+import os
+import sys
 
-# Connect to DB
-conn = sqlite3.connect("leave_management_system.db")
-cursor = conn.cursor()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import reports
+from db import pool
 
-# Get today's date
-today = datetime.today().date()
+# Borrow a connection from the shared pool
+conn = pool.acquire()
 
-# Fetch employees who are currently present
-query = """
-SELECT e.name, e.position, e.department, e.phone, e.email
-FROM employees e
-LEFT JOIN leaves l ON e.id = l.employee_id
-WHERE (l.status IS NULL 
-       OR l.returned = 'Yes' 
-       OR l.end_date < ?)
-GROUP BY e.id
-ORDER BY e.name
-"""
-
-cursor.execute(query, (today,))
-present_employees = cursor.fetchall()
+# Employees who are not on an approved, unreturned leave
+present_employees = reports.present(conn)
 
 # Print header
 print("Employees Currently Present:", len(present_employees))
@@ -29,8 +17,7 @@ print("-" * 80)
 
 # Print details
 for emp in present_employees:
-    name, position, department, phone, email = emp
-    print(f"Name: {name}, Position: {position}, Department: {department}, Phone: {phone}, Email: {email}")
+    print(f"Name: {emp['name']}, Position: {emp['position']}, Department: {emp['department']}, Phone: {emp['phone']}, Email: {emp['email']}")
 
-# Close connection
-conn.close()
+# Return connection to the pool
+pool.release(conn)
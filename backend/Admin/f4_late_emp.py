@@ -1,26 +1,15 @@
-import sqlite3
-from datetime import datetime
+import os
+import sys
 
-# Connect to DB
-conn = sqlite3.connect("leave_management_system.db")
-cursor = conn.cursor()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import reports
+from db import pool
 
-# Today's date
-today = datetime.today().date()
+# Borrow a connection from the shared pool
+conn = pool.acquire()
 
-# Query for overdue employees
-query = """
-SELECT e.name, e.position, e.department, e.phone, e.email, l.reason, l.end_date
-FROM employees e
-JOIN leaves l ON e.id = l.employee_id
-WHERE l.status = 'Approved'
-  AND l.returned = 'No'
-  AND l.end_date < ?
-ORDER BY l.end_date
-"""
-
-cursor.execute(query, (today,))
-overdue_employees = cursor.fetchall()
+# Employees still on leave after their end date (as of today)
+overdue_employees = reports.overdue(conn)
 
 # Print header
 print("Employees with Overdue Returns:", len(overdue_employees))
@@ -28,8 +17,7 @@ print("-" * 80)
 
 # Print details
 for emp in overdue_employees:
-    name, position, department, phone, email, reason, end_date = emp
-    print(f"Name: {name}, Position: {position}, Department: {department}, Phone: {phone}, Email: {email}, Reason: {reason}, End Date: {end_date}")
+    print(f"Name: {emp['name']}, Position: {emp['position']}, Department: {emp['department']}, Phone: {emp['phone']}, Email: {emp['email']}, Reason: {emp['reason']}, End Date: {emp['end_date']}")
 
-# Close connection
-conn.close()
+# Return connection to the pool
+pool.release(conn)
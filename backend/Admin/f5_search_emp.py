@@ -1,11 +1,33 @@
-import sqlite3
+import os
+import sys
 
-# Connect to DB
-conn = sqlite3.connect("leave_management_system.db")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import search
+from db import pool
+
+# Borrow a connection from the shared pool
+conn = pool.acquire()
 cursor = conn.cursor()
 
-# Ask user for Employee ID
-emp_id = input("Enter Employee ID to search: ").strip()
+# Ask user for an Employee ID, or a name/position/department/email to search for
+query = input("Enter Employee ID or search text: ").strip()
+emp_id = query
+if not query.isdigit():
+    try:
+        matches = search.search(conn, query, 10)
+    except ValueError as e:
+        matches = []
+        print(f"Error: {e}")
+    if len(matches) == 1:
+        emp_id = matches[0]['id']
+    elif matches:
+        print("\nMatching Employees:")
+        print("-" * 50)
+        for match in matches:
+            print(f"ID: {match['id']}, Name: {match['name']}, Position: {match['position']}, Department: {match['department']}")
+        print("\nRun again with one of the IDs above for full details.")
+        pool.release(conn)
+        sys.exit(0)
 
 # Fetch employee details
 cursor.execute("""
@@ -50,7 +72,7 @@ if employee:
         print("\nNo leave history found for this employee.")
 
 else:
-    print(f"No employee found with ID: {emp_id}")
+    print(f"No employee found for: {query}")
 
-# Close connection
-conn.close()
+# Return connection to the pool
+pool.release(conn)
@@ -1,7 +1,11 @@
-import sqlite3
+import os
+import sys
 
-# Connect to DB
-conn = sqlite3.connect("leave_management_system.db")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from db import pool
+
+# Borrow a connection from the shared pool
+conn = pool.acquire()
 cursor = conn.cursor()
 
 # Ask admin for employee ID to edit
@@ -51,5 +55,5 @@ else:
     conn.commit()
     print("\nEmployee details updated successfully!")
 
-# Close connection
-conn.close()
+# Return connection to the pool
+pool.release(conn)
@@ -1,20 +1,25 @@
-import sqlite3
+import os
+import sys
 
-# Connect to DB
-conn = sqlite3.connect("leave_management_system.db")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from auth import revoke
+from db import pool
+
+# Borrow a connection from the shared pool
+conn = pool.acquire()
 cursor = conn.cursor()
 
 # Ask for Employee ID
 emp_id = input("Enter Employee ID to delete: ").strip()
 
 # Check if employee exists
-cursor.execute("SELECT name FROM employees WHERE id = ?", (emp_id,))
+cursor.execute("SELECT id, name FROM employees WHERE id = ?", (emp_id,))
 employee = cursor.fetchone()
 
 if not employee:
     print(f"No employee found with ID: {emp_id}")
 else:
-    name = employee[0]
+    emp_id, name = employee
     confirm = input(f"Are you sure you want to delete {name}? (yes/no): ").strip().lower()
     if confirm == "yes":
         # Delete from leaves first (foreign key)
@@ -23,10 +28,12 @@ else:
         cursor.execute("DELETE FROM employee_users WHERE employee_id = ?", (emp_id,))
         # Delete from employees
         cursor.execute("DELETE FROM employees WHERE id = ?", (emp_id,))
+        # Tokens already issued to them stop working, as when deleted through the API
+        revoke(conn, emp_id)
         conn.commit()
         print(f"Employee {name} (ID: {emp_id}) has been deleted successfully!")
     else:
         print("Deletion canceled.")
 
-# Close connection
-conn.close()
+# Return connection to the pool
+pool.release(conn)
@@ -1,9 +1,14 @@
-import sqlite3
+import os
+import sys
 from werkzeug.security import generate_password_hash
 import random
 
-# Connect to DB
-conn = sqlite3.connect("leave_management_system.db")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from accrual import seed
+from db import pool
+
+# Borrow a connection from the shared pool
+conn = pool.acquire()
 cursor = conn.cursor()
 
 print("Enter new employee details:")
@@ -37,10 +42,14 @@ INSERT INTO employee_users (employee_id, username, password)
 VALUES (?, ?, ?)
 """, (employee_id, username, password_hashed))
 
+# First balance: this year's entitlement, pro-rated from the join date
+balance = seed(conn, [employee_id]).get(employee_id)
+
 conn.commit()
-conn.close()
+pool.release(conn)
 
 print("\nNew employee added successfully!")
 print(f"Employee ID: {employee_id}")
 print(f"Username: {username}")
 print(f"Password: {password_plain}")
+print(f"Leave balance: {balance}")
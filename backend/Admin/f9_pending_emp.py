@@ -1,20 +1,15 @@
-import sqlite3
+import os
+import sys
 
-# Connect to DB
-conn = sqlite3.connect("leave_management_system.db")
-cursor = conn.cursor()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import reports
+from db import pool
 
-# Fetch pending leave requests
-query = """
-SELECT e.id, e.name, e.position, e.department, e.phone, l.leave_days, l.reason, l.status
-FROM employees e
-JOIN leaves l ON e.id = l.employee_id
-WHERE l.status = 'Pending'
-ORDER BY l.applied_on
-"""
+# Borrow a connection from the shared pool
+conn = pool.acquire()
 
-cursor.execute(query)
-pending_leaves = cursor.fetchall()
+# Fetch pending leave requests
+pending_leaves = reports.pending(conn)
 
 # Print header
 print("Pending Leave Requests:", len(pending_leaves))
@@ -22,8 +17,7 @@ print("-" * 100)
 
 # Print details
 for leave in pending_leaves:
-    emp_id, name, position, department, phone, leave_days, reason, status = leave
-    print(f"ID: {emp_id}, Name: {name}, Position: {position}, Department: {department}, Phone: {phone}, Leave Days: {leave_days}, Reason: {reason}, Status: {status}")
+    print(f"ID: {leave['id']}, Name: {leave['name']}, Position: {leave['position']}, Department: {leave['department']}, Phone: {leave['phone']}, Leave Days: {leave['leave_days']}, Reason: {leave['reason']}, Status: {leave['status']}")
 
-# Close connection
-conn.close()
+# Return connection to the pool
+pool.release(conn)
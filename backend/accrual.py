@@ -0,0 +1,256 @@
+import argparse
+import datetime
+import json
+import os
+
+import numpy as np
+
+from balances import DEFAULT_BALANCE
+from days import SQL_DAY, to_day
+from db import connection, run_in_transaction
+from leaves import ID_CHUNK
+
+# Year-end accrual: every employee's unused balance is carried over up to a
+# cap, and the new year's entitlement is added on top. The entitlement depends
+# on the position. It is pro-rated for people who join during the year. The
+# run is computed for the whole company at once on NumPy arrays. It is written
+# back in one transaction, and each employee's change is recorded in
+# balance_adjustments. New employees start with their pro-rated entitlement
+# for the year they join (seed), recorded as a 'joined' adjustment.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+POLICY_PATH = os.environ.get('LMS_ACCRUAL_POLICY', os.path.join(BASE_DIR, 'accrual_policy.json'))
+
+SCHEMA = (
+    # Set when the employee is created; NULL for people who predate it (treated as joined long ago)
+    'ALTER TABLE employees ADD COLUMN joined_on TEXT',
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_employee_joined AFTER INSERT ON employees
+    WHEN NEW.joined_on IS NULL
+    BEGIN
+        UPDATE employees SET joined_on = date('now') WHERE id = NEW.id;
+    END
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS balance_adjustments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        employee_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        previous_balance INTEGER NOT NULL,
+        carried_over INTEGER NOT NULL,
+        forfeited INTEGER NOT NULL,
+        accrued INTEGER NOT NULL,
+        new_balance INTEGER NOT NULL,
+        last_leave_id INTEGER NOT NULL,
+        applied_on TEXT NOT NULL,
+        kind TEXT NOT NULL DEFAULT 'accrual',
+        FOREIGN KEY(employee_id) REFERENCES employees(id)
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS idx_balance_adjustments_employee ON balance_adjustments (employee_id, id)',
+    'CREATE INDEX IF NOT EXISTS idx_balance_adjustments_year ON balance_adjustments (year)',
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_employee_delete_balances AFTER DELETE ON employees
+    BEGIN
+        DELETE FROM balance_adjustments WHERE employee_id = OLD.id;
+        DELETE FROM balances WHERE employee_id = OLD.id;
+    END
+    """,
+)
+
+
+class AccrualError(Exception):
+    """The run cannot be applied; message is shown to the operator."""
+
+
+def load_policy(path=POLICY_PATH):
+    """The accrual policy, with defaults for anything the file leaves out.
+
+    entitlement: days per year; positions: {position: days} overrides;
+    carry_over_cap: most unused days kept into the new year (null = no cap);
+    prorate_joiners: scale the entitlement by the part of the year worked;
+    include_inactive: also accrue for employees whose status is Inactive.
+    """
+    policy = {'entitlement': DEFAULT_BALANCE, 'positions': {}, 'carry_over_cap': None,
+              'prorate_joiners': True, 'include_inactive': False}
+    if os.path.exists(path):
+        with open(path) as f:
+            policy.update(json.load(f))
+    return policy
+
+
+def entitlements(positions, joined, year, policy):
+    """Days accrued for year per employee: by position, pro-rated by join day (a day number) if the policy says so."""
+    first, last = to_day(f'{year}-01-01'), to_day(f'{year}-12-31')
+    if len(positions):
+        names, index = np.unique(positions.astype(str), return_inverse=True)
+        by_position = np.array([policy['positions'].get(name, policy['entitlement']) for name in names], dtype=float)
+        entitlement = by_position[index]
+    else:
+        entitlement = np.zeros(0)
+    if policy['prorate_joiners']:
+        worked = np.clip(last - np.maximum(joined, first) + 1, 0, last - first + 1) / (last - first + 1)
+        entitlement = entitlement * worked
+    return np.floor(entitlement + 0.5).astype(np.int64)
+
+
+def compute(conn, year, policy):
+    """New balances for every employee for year, as column arrays (nothing is written).
+
+    People who join during year have nothing to carry over: their balance is
+    the entitlement seeded when they were added. People who join after year
+    are left out.
+    """
+    where = '' if policy['include_inactive'] else "AND COALESCE(e.status, '') != 'Inactive'"
+    rows = conn.execute(f"""
+        SELECT e.id, COALESCE(e.position, ''), {SQL_DAY.format('e.joined_on')},
+               b.remaining_days, COALESCE(b.last_leave_id, 0)
+        FROM employees e
+        LEFT JOIN balances b ON b.employee_id = e.id
+        WHERE (e.joined_on IS NULL OR e.joined_on <= ?) {where}
+        ORDER BY e.id
+    """, (f'{year}-12-31',)).fetchall()
+
+    first = to_day(f'{year}-01-01')
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    positions = np.array([row[1] for row in rows], dtype=object)
+    joined = np.array([first - 1 if row[2] is None else row[2] for row in rows], dtype=np.int64)
+    previous = np.array([DEFAULT_BALANCE if row[3] is None else row[3] for row in rows], dtype=np.int64)
+    last_leave_ids = np.array([row[4] for row in rows], dtype=np.int64)
+
+    accrued = entitlements(positions, joined, year, policy)
+
+    unused = np.maximum(previous, 0)
+    cap = policy['carry_over_cap']
+    carried = unused if cap is None else np.minimum(unused, cap)
+    carried = np.where(joined >= first, 0, carried)
+
+    return {
+        'employee_id': ids,
+        'position': positions,
+        'previous_balance': previous,
+        'carried_over': carried,
+        'forfeited': unused - carried,
+        'accrued': accrued,
+        'new_balance': carried + accrued,
+        'last_leave_id': last_leave_ids,
+    }
+
+
+def seed(conn, emp_ids, policy=None):
+    """Give new employees their first balance; run in the transaction that inserts them.
+
+    That is the entitlement for the year they joined, pro-rated from joined_on
+    like compute(), instead of DEFAULT_BALANCE until the next accrual run.
+    Employees who already have a balance are left alone. Returns
+    {employee_id: balance}.
+    """
+    policy = policy or load_policy()
+    rows = []
+    for chunk in range(0, len(emp_ids), ID_CHUNK):
+        ids = emp_ids[chunk:chunk + ID_CHUNK]
+        rows += conn.execute(f"""
+            SELECT id, COALESCE(position, ''), COALESCE(joined_on, date('now'))
+            FROM employees WHERE id IN ({', '.join('?' * len(ids))})
+        """, ids).fetchall()
+
+    applied_on = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    seeded = {}
+    for year in sorted({int(row[2][:4]) for row in rows}):
+        joiners = [row for row in rows if int(row[2][:4]) == year]
+        accrued = entitlements(np.array([row[1] for row in joiners], dtype=object),
+                               np.array([to_day(row[2]) for row in joiners], dtype=np.int64), year, policy)
+        for (emp_id, _, _), days in zip(joiners, accrued.tolist()):
+            if not conn.execute("""
+                INSERT INTO balances (employee_id, remaining_days, last_leave_id) VALUES (?, ?, 0)
+                ON CONFLICT (employee_id) DO NOTHING
+            """, (emp_id, days)).rowcount:
+                continue
+            conn.execute("""
+                INSERT INTO balance_adjustments (employee_id, year, previous_balance, carried_over, forfeited, accrued,
+                                                 new_balance, last_leave_id, applied_on, kind)
+                VALUES (?, ?, 0, 0, 0, ?, ?, 0, ?, 'joined')
+            """, (emp_id, year, days, days, applied_on))
+            seeded[emp_id] = days
+    return seeded
+
+
+def diff(result):
+    """Per-employee rows whose balance changes, for the dry-run report."""
+    changed = np.flatnonzero(result['new_balance'] != result['previous_balance'])
+    return [{key: (values[i].item() if hasattr(values[i], 'item') else values[i]) for key, values in result.items()}
+            for i in changed]
+
+
+def totals(result):
+    return {key: int(result[key].sum())
+            for key in ('previous_balance', 'carried_over', 'forfeited', 'accrued', 'new_balance')}
+
+
+def run(conn, year, policy, force=False):
+    """Compute and write year's balances in one BEGIN IMMEDIATE transaction.
+
+    Computing inside the transaction means no leave can be submitted between
+    reading the old balances and writing the new ones. A year can only be
+    applied once unless force is set. Returns the computed columns.
+    """
+    def apply(conn):
+        if not force and conn.execute("SELECT 1 FROM balance_adjustments WHERE year = ? AND kind = 'accrual' LIMIT 1",
+                                      (year,)).fetchone():
+            raise AccrualError(f'Accrual for {year} has already been applied (use --force to apply it again)')
+        result = compute(conn, year, policy)
+        columns = [result[key].tolist() for key in
+                   ('employee_id', 'previous_balance', 'carried_over', 'forfeited', 'accrued', 'new_balance',
+                    'last_leave_id')]
+        rows = list(zip(*columns))
+        conn.executemany("""
+            INSERT INTO balances (employee_id, remaining_days, last_leave_id) VALUES (?, ?, ?)
+            ON CONFLICT (employee_id) DO UPDATE SET remaining_days = excluded.remaining_days
+        """, [(emp_id, new, leave_id) for emp_id, _, _, _, _, new, leave_id in rows])
+        applied_on = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        conn.executemany("""
+            INSERT INTO balance_adjustments (employee_id, year, previous_balance, carried_over, forfeited, accrued,
+                                             new_balance, last_leave_id, applied_on)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(emp_id, year, previous, carried, forfeited, accrued, new, leave_id, applied_on)
+              for emp_id, previous, carried, forfeited, accrued, new, leave_id in rows])
+        # The balance is part of the profile, whose ETag is the employee's version
+        conn.executemany('UPDATE employees SET version = version + 1 WHERE id = ?',
+                         [(emp_id,) for emp_id, previous, *_, new, _ in rows if new != previous])
+        return result
+
+    return run_in_transaction(conn, apply)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Year-end leave accrual and carry-over.')
+    parser.add_argument('year', type=int, nargs='?', default=datetime.date.today().year,
+                        help='the year being started (default: this year)')
+    parser.add_argument('--dry-run', action='store_true', help='show the changes without writing them')
+    parser.add_argument('--force', action='store_true', help='apply even if this year was already applied')
+    parser.add_argument('--policy', default=POLICY_PATH)
+    args = parser.parse_args()
+
+    policy = load_policy(args.policy)
+    with connection() as conn:
+        try:
+            result = compute(conn, args.year, policy) if args.dry_run else run(conn, args.year, policy, args.force)
+        except AccrualError as e:
+            raise SystemExit(f"Error: {e}")
+
+    changes = diff(result)
+    print(f"Accrual for {args.year}{' (dry run, nothing written)' if args.dry_run else ''}: "
+          f"{len(result['employee_id'])} employees, {len(changes)} balances change")
+    print("-" * 80)
+    for row in changes:
+        print(f"Employee ID: {row['employee_id']}, Position: {row['position'] or '-'}, "
+              f"{row['previous_balance']} -> {row['new_balance']} (carried {row['carried_over']}, "
+              f"forfeited {row['forfeited']}, accrued {row['accrued']})")
+    total = totals(result)
+    print("-" * 80)
+    print(f"Total: {total['previous_balance']} -> {total['new_balance']} days "
+          f"(carried {total['carried_over']}, forfeited {total['forfeited']}, accrued {total['accrued']})")
+
+
+if __name__ == '__main__':
+    main()
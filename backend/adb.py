@@ -0,0 +1,113 @@
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+from db import DB_PATH, PRAGMAS, PoolTimeout, pool
+
+
+class AsyncPool:
+    """A fixed-size pool of aiosqlite connections for the ASGI app.
+
+    Only the queries asgi.py runs on the event loop itself use it: the token
+    revocation check and the leave export stream. The route handlers use the
+    sqlite3 pool on worker threads. aiosqlite runs each connection on its own
+    thread, so these queries never block the loop; the pool bounds how many of
+    those threads exist. Settings
+    match db.ConnectionPool (same PRAGMAs, Row rows, WAL set up once).
+    """
+
+    def __init__(self, path=DB_PATH, size=8, timeout=10.0):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = None
+        self._created = 0
+        self._all = []
+        self._stats = {'hits': 0, 'misses': 0, 'waits': 0, 'timeouts': 0}
+
+    async def _connect(self):
+        conn = await aiosqlite.connect(self.path, timeout=self.timeout)
+        conn.row_factory = sqlite3.Row
+        for name, value in PRAGMAS:
+            await conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    async def acquire(self):
+        if self._idle is None:
+            self._idle = asyncio.LifoQueue()
+        try:
+            conn = self._idle.get_nowait()
+            self._stats['hits'] += 1
+            return conn
+        except asyncio.QueueEmpty:
+            pass
+        if self._created < self.size:
+            self._created += 1
+            self._stats['misses'] += 1
+            try:
+                conn = await self._connect()
+            except Exception:
+                self._created -= 1
+                raise
+            self._all.append(conn)
+            return conn
+        self._stats['waits'] += 1
+        try:
+            return await asyncio.wait_for(self._idle.get(), self.timeout)
+        except asyncio.TimeoutError:
+            self._stats['timeouts'] += 1
+            raise PoolTimeout(f'No database connection available after {self.timeout}s')
+
+    async def release(self, conn):
+        if conn.in_transaction:
+            await conn.rollback()
+        self._idle.put_nowait(conn)
+
+    async def close_all(self):
+        for conn in self._all:
+            await conn.close()
+        self._all = []
+        self._idle = None
+        self._created = 0
+
+    def stats(self):
+        data = dict(self._stats)
+        data['size'] = self.size
+        data['open'] = self._created
+        data['idle'] = self._idle.qsize() if self._idle is not None else 0
+        lookups = data['hits'] + data['misses'] + data['waits']
+        data['hit_rate'] = round(data['hits'] / lookups, 4) if lookups else 0.0
+        return data
+
+
+apool = AsyncPool()
+
+
+@asynccontextmanager
+async def aconnection():
+    conn = await apool.acquire()
+    try:
+        yield conn
+    finally:
+        await apool.release(conn)
+
+
+async def fetchone(sql, params=()):
+    async with aconnection() as conn:
+        async with conn.execute(sql, params) as cursor:
+            return await cursor.fetchone()
+
+
+def init_app(app):
+    apool.path = app.config.get('DB_PATH', DB_PATH)
+    apool.size = app.config.get('DB_POOL_SIZE', 8)
+    apool.timeout = app.config.get('DB_POOL_TIMEOUT', 10.0)
+    # The sqlite3 pool backs the api.py handlers, which asgi.py runs on worker threads
+    pool.configure(path=apool.path, size=apool.size, timeout=apool.timeout)
+    pool.setup()
+
+    @app.after_serving
+    async def close_pool():
+        await apool.close_all()
@@ -0,0 +1,600 @@
+import sqlite3
+
+import db
+import employee_import
+import events
+import export
+import metrics
+import reports
+import search
+from auth import issue_token, revoke, token_cache
+from balances import get_balance
+from cache import report_cache
+from filters import (EMPLOYEE_COLUMNS, EMPLOYEE_SELECT, EMPLOYEE_UPDATE_FIELDS, LEAVE_COLUMNS, LEAVE_LIST_SELECT,
+                     LEAVE_SELECT, LEAVE_SOURCE, calendar_args, detail_args, employee_filters, export_query,
+                     leave_filters)
+from leaves import (InsufficientBalance, LeaveError, OverlappingLeave, overlapping_pairs, owners, returned_for,
+                    set_status, submit_leave)
+from pagination import decode_cursor, encode_cursor, fetch_page, is_paged, parse_date, parse_fields, parse_limit
+from passwords import HasherBusy, hasher
+from versions import employee_version
+
+# The /api handlers, shared by the WSGI (server.py) and ASGI (asgi.py) apps.
+# A handler is a plain function of an ApiRequest (plus the URL parameters)
+# that returns a JSON body, a (body, status) pair or one of the reply types
+# below, and raises ApiError for error responses. The apps only adapt their
+# framework's request and response objects and register ROUTES; the async app
+# runs each handler on a worker thread.
+
+
+class ApiError(Exception):
+    """An error response: status plus the JSON body fields (usually message)."""
+
+    def __init__(self, status, **body):
+        super().__init__(body.get('message') or body.get('error'))
+        self.status = status
+        self.body = body
+
+
+class ApiRequest:
+    """What a handler sees of a request.
+
+    user is the decoded token (None on public routes), args the query string
+    (a MultiDict), json the parsed body or None, data the raw body text and
+    files the multipart uploads. conn borrows a pooled connection on first use
+    through connect; release, if given, returns it when close() is called.
+    """
+
+    def __init__(self, user=None, args=None, json=None, data='', files=None, mimetype=None, headers=None,
+                 if_none_match=None, config=None, connect=None, release=None):
+        self.user = user
+        self.args = args
+        self.json = json
+        self.data = data
+        self.files = files or {}
+        self.mimetype = mimetype
+        self.headers = headers or {}
+        self.if_none_match = if_none_match
+        self.config = config or {}
+        self._connect = connect
+        self._release = release
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None and self._release is not None:
+            self._release(conn)
+
+
+class Reply:
+    """A response with an ETag or a non-JSON body.
+
+    body is sent as JSON, or as text when mimetype is set. status 304 sends no
+    body. With an etag, the response is marked private, no-cache.
+    """
+
+    def __init__(self, body=None, status=200, etag=None, mimetype=None):
+        self.body = body
+        self.status = status
+        self.etag = etag
+        self.mimetype = mimetype
+
+
+class Export:
+    """A leave export; each app streams the rows of sql from its own cursor."""
+
+    def __init__(self, sql, params, fmt):
+        self.sql = sql
+        self.params = params
+        self.fmt = fmt
+        self.mimetype = export.FORMATS[fmt]
+        self.headers = {'Content-Disposition': f'attachment; filename=leaves.{fmt}'}
+
+
+class EventStream:
+    """A server-sent event stream for topics; each app subscribes and streams it."""
+
+    mimetype = 'text/event-stream'
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+    def __init__(self, topics):
+        self.topics = topics
+
+
+def reply(result):
+    """Normalize a handler's return value to a Reply (Export and EventStream pass through)."""
+    if isinstance(result, (Reply, Export, EventStream)):
+        return result
+    if isinstance(result, tuple):
+        return Reply(*result)
+    return Reply(result)
+
+
+def _admin(req):
+    if req.user['role'] != 'admin':
+        raise ApiError(403, message='Unauthorized')
+
+
+def _employee_id(req):
+    emp_id = req.user.get('user_id')
+    if not emp_id:
+        raise ApiError(400, message='Employee ID not found in token')
+    return emp_id
+
+
+def _conditional(req, etag, build):
+    """build()'s body under etag, or an empty 304 if the client already has it."""
+    if req.if_none_match is not None and req.if_none_match.contains(etag):
+        return Reply(status=304, etag=etag)
+    return Reply(build(), etag=etag)
+
+
+def _cached_report(req, key, compute):
+    """A cached report, or 304 if the client's ETag is current."""
+    stamp = report_cache.stamp(req.conn)
+    result = _conditional(req, report_cache.etag(key, stamp),
+                          lambda: report_cache.get_or_compute(key, compute, stamp))
+    if result.status == 304:
+        report_cache.count_not_modified()
+    return result
+
+
+# --- Login ---
+
+def login(req):
+    data = req.json
+    if not data or not data.get('username') or not data.get('password'):
+        raise ApiError(400, message='Missing username or password')
+
+    username = data.get('username')
+    password = data.get('password')
+    secret_key = req.config['SECRET_KEY']
+
+    # Quick check for Admin (as per hardcoded requirements in prompt)
+    if username == 'admin' and password == 'admin123':
+        token = issue_token(secret_key, user='admin', role='admin')
+        return {'token': token, 'role': 'admin', 'username': 'admin'}
+
+    # Check for Employee. The connection goes back to the pool before the slow hash check.
+    with db.connection() as conn:
+        user = conn.execute('SELECT employee_id, username, password FROM employee_users WHERE username = ?',
+                            (username,)).fetchone()
+
+    try:
+        valid = user is not None and hasher.verify(user['password'], password)
+    except HasherBusy:
+        raise ApiError(503, message='Server busy, please retry')
+
+    if valid:
+        token = issue_token(secret_key, user_id=user['employee_id'], username=user['username'], role='employee')
+        return {'token': token, 'role': 'employee', 'username': user['username'], 'employee_id': user['employee_id']}
+
+    raise ApiError(401, message='Invalid credentials')
+
+
+# --- Admin: employees ---
+
+def list_employees(req):
+    _admin(req)
+
+    # Optional filters, ?fields= projection and keyset pagination (?limit=&cursor=)
+    args = req.args
+    where, params = employee_filters(args)
+    select = parse_fields(args, EMPLOYEE_COLUMNS, 'id') or EMPLOYEE_SELECT
+    employees, next_cursor = fetch_page(req.conn, select, 'employees', where, params, 'id', 'id', args)
+
+    items = [dict(row) for row in employees]
+    if not is_paged(args):
+        return items
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def search_employees(req):
+    _admin(req)
+
+    # Ranked prefix matches from the employees_fts index; the cursor is the offset of the next page
+    limit = parse_limit(req.args)
+    offset = decode_cursor(req.args['cursor']) if req.args.get('cursor') else 0
+    rows = search.search(req.conn, req.args.get('q'), limit + 1, offset)
+
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = encode_cursor(offset + limit) if len(rows) > limit else None
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def add_employee(req):
+    _admin(req)
+
+    # Hashed before the write transaction, with the id predicted as for imports
+    data = req.json
+    try:
+        values = tuple(data[name] for name in employee_import.FIELDS)
+        emp_id, = employee_import.create_employees(req.conn, [values])
+    except HasherBusy:
+        raise ApiError(503, message='Server busy, please retry')
+    except employee_import.IdConflict as e:
+        raise ApiError(409, message=str(e))
+    except employee_import.RowsRejected as e:
+        raise ApiError(400, error=e.errors[0])
+    except (KeyError, TypeError, sqlite3.Error) as e:
+        raise ApiError(400, error=str(e))
+    return {'message': 'Employee added', 'id': emp_id, 'username': f'user{emp_id}', 'password': f'pass{emp_id}'}, 210
+
+
+def import_employees(req):
+    _admin(req)
+
+    # Accepts a JSON body, a text/csv body, or a multipart upload named "file"
+    upload = req.files.get('file')
+    if upload:
+        data = upload.read().decode('utf-8-sig')
+        fmt = 'csv' if upload.filename.lower().endswith('.csv') else 'json'
+    else:
+        data = req.data
+        fmt = 'csv' if req.mimetype == 'text/csv' else 'json'
+    try:
+        rows = employee_import.parse_file(data, fmt)
+        results = employee_import.import_employees(req.conn, rows)
+    except employee_import.ImportFileError as e:
+        raise ApiError(400, message=str(e))
+    except employee_import.IdConflict as e:
+        raise ApiError(409, message=str(e), results=e.results)
+    except employee_import.RowsRejected as e:
+        raise ApiError(400, message=str(e), results=e.results)
+    except HasherBusy:
+        raise ApiError(503, message='Server busy, please retry')
+
+    created = sum(1 for result in results if result['status'] == 'created')
+    return {'created': created, 'failed': len(results) - created, 'results': results}
+
+
+def update_employee(req, emp_id):
+    _admin(req)
+
+    data = req.json
+    conn = req.conn
+    try:
+        fields = [name for name in EMPLOYEE_UPDATE_FIELDS if name in data]
+        if not fields:
+            raise ApiError(400, message='No fields to update')
+
+        query = f"UPDATE employees SET {', '.join(f'{name} = ?' for name in fields)} WHERE id = ?"
+        conn.execute(query, [data[name] for name in fields] + [emp_id])
+        conn.commit()
+    except ApiError:
+        raise
+    except Exception as e:
+        conn.rollback()
+        raise ApiError(400, error=str(e))
+    return {'message': 'Employee updated successfully'}
+
+
+def employees_details(req):
+    _admin(req)
+
+    # Many employees with their leave histories in two queries, instead of one request per employee
+    ids, history_limit = detail_args(req.args)
+    items, not_found = reports.employee_details(req.conn, ids, history_limit)
+    return {'items': items, 'not_found': not_found}
+
+
+def employee_details(req, emp_id):
+    _admin(req)
+
+    conn = req.conn
+    employee = conn.execute(f'SELECT {EMPLOYEE_SELECT} FROM employees WHERE id = ?', (emp_id,)).fetchone()
+    if not employee:
+        raise ApiError(404, message='Employee not found')
+
+    leaves = conn.execute(f'SELECT {LEAVE_SELECT} FROM leaves WHERE employee_id = ? ORDER BY start_date DESC',
+                          (emp_id,)).fetchall()
+    emp_data = dict(employee)
+    emp_data['leave_history'] = [dict(row) for row in leaves]
+    return emp_data
+
+
+def delete_employee(req, emp_id):
+    _admin(req)
+
+    conn = req.conn
+    try:
+        employee = conn.execute('SELECT name FROM employees WHERE id = ?', (emp_id,)).fetchone()
+        if not employee:
+            raise ApiError(404, message='Employee not found')
+
+        # Delete related leaves and the login first
+        conn.execute('DELETE FROM leaves WHERE employee_id = ?', (emp_id,))
+        conn.execute('DELETE FROM employee_users WHERE employee_id = ?', (emp_id,))
+        conn.execute('DELETE FROM employees WHERE id = ?', (emp_id,))
+        # Tokens already issued to them stop working in every worker
+        revoke(conn, emp_id)
+        conn.commit()
+    except ApiError:
+        raise
+    except Exception as e:
+        conn.rollback()
+        raise ApiError(400, error=str(e))
+    return {'message': f"Employee {employee['name']} deleted successfully"}
+
+
+def revoke_employee_tokens(req, emp_id):
+    _admin(req)
+
+    # Tokens issued to this employee so far stop working; they can log in again
+    invalidated = revoke(req.conn, emp_id)
+    req.conn.commit()
+    return {'message': f'Tokens revoked for employee {emp_id}', 'cached_tokens_invalidated': invalidated}
+
+
+# --- Admin: leaves ---
+
+def list_leaves(req):
+    _admin(req)
+
+    # Optional filters, ?fields= projection and keyset pagination (?limit=&cursor=)
+    args = req.args
+    where, params = leave_filters(args)
+    select = parse_fields(args, LEAVE_COLUMNS, 'leave_id') or LEAVE_LIST_SELECT
+    leaves, next_cursor = fetch_page(req.conn, select, LEAVE_SOURCE, where, params, 'leave_id', 'l.leave_id', args)
+
+    items = [dict(row) for row in leaves]
+    if not is_paged(args):
+        return items
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def export_leaves(req):
+    _admin(req)
+
+    fmt = req.args.get('format', 'ndjson')
+    if fmt not in export.FORMATS:
+        raise ApiError(400, message=f"format must be one of: {', '.join(export.FORMATS)}")
+    sql, params = export_query(req.args)
+    return Export(sql, params, fmt)
+
+
+def _publish_status(owner, status):
+    events.publish_leaves('leave_status', [(emp_id, {'leave_id': leave_id, 'status': status,
+                                                      'returned': returned_for(status)})
+                                           for leave_id, emp_id in owner.items()])
+
+
+def update_leave_status(req, leave_id):
+    _admin(req)
+
+    status = (req.json or {}).get('status')  # 'Approved' or 'Rejected'
+
+    # Same validation and transition as the bulk endpoint
+    conn = req.conn
+    try:
+        outcomes = set_status(conn, status, [leave_id])
+    except LeaveError as e:
+        raise ApiError(400, message=str(e))
+    if outcomes[leave_id] != 'updated':
+        raise ApiError(404, message='Leave not found')
+    _publish_status(owners(conn, [leave_id]), status)
+    return {'message': f'Leave {status.lower()}'}
+
+
+def update_leave_status_bulk(req):
+    _admin(req)
+
+    # {"status": "Approved", "leave_ids": [1, 2]} or
+    # {"status": "Rejected", "filter": {"status": "Pending", "department": "HR", "applied_before": "2026-02-01"}}
+    data = req.json or {}
+    leave_ids = data.get('leave_ids')
+    criteria = data.get('filter')
+    if leave_ids is not None:
+        if not isinstance(leave_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in leave_ids):
+            raise ApiError(400, message='leave_ids must be a list of integers')
+        where, params = None, ()
+    elif isinstance(criteria, dict) and criteria:
+        where, params = leave_filters(criteria)
+        if not where:
+            raise ApiError(400, message='filter has no recognised criteria')
+    else:
+        raise ApiError(400, message='Provide leave_ids or a filter')
+
+    conn = req.conn
+    try:
+        outcomes = set_status(conn, data.get('status'), leave_ids, where, params)
+    except LeaveError as e:
+        raise ApiError(400, message=str(e))
+
+    updated_ids = [leave_id for leave_id, outcome in outcomes.items() if outcome == 'updated']
+    _publish_status(owners(conn, updated_ids), data['status'])
+
+    updated = len(updated_ids)
+    return {
+        'status': data['status'],
+        'updated': updated,
+        'not_found': len(outcomes) - updated,
+        'results': [{'leave_id': leave_id, 'outcome': outcome} for leave_id, outcome in outcomes.items()],
+    }
+
+
+# --- Admin: reports ---
+
+def overlapping_leaves(req):
+    _admin(req)
+
+    # Pending/approved leaves of the same employee that share days, found in one sweep
+    def compute():
+        pairs = overlapping_pairs(req.conn)
+        return {'count': len(pairs), 'pairs': pairs}
+
+    return _cached_report(req, ('overlaps',), compute)
+
+
+def admin_summary(req):
+    _admin(req)
+
+    try:
+        top = int(req.args.get('top', 10))
+    except ValueError:
+        raise ApiError(400, message='top must be an integer')
+    as_of = parse_date(req.args, 'as_of') or reports.today()
+    top = max(0, min(top, 100))
+    return _cached_report(req, ('summary', as_of, top), lambda: reports.summary(req.conn, as_of, top))
+
+
+def leave_calendar(req):
+    _admin(req)
+
+    # Daily approved-leave counts per department; ?day= adds the people out that day
+    date_from, date_to, department, day = calendar_args(req.args)
+
+    def compute():
+        result = reports.calendar(req.conn, date_from, date_to, department)
+        if day:
+            result['day'] = day
+            result['people'] = [dict(row) for row in reports.absent_on(req.conn, day, department)]
+        return result
+
+    return _cached_report(req, ('calendar', date_from, date_to, department, day), compute)
+
+
+# --- Admin: stats ---
+
+def db_stats(req):
+    _admin(req)
+    return db.pool.stats()
+
+
+def cache_stats(req):
+    _admin(req)
+    return report_cache.stats()
+
+
+def auth_stats(req):
+    _admin(req)
+    return token_cache.stats()
+
+
+def slow_queries(req):
+    _admin(req)
+
+    # Most recent statements over METRICS_SLOW_QUERY_MS, with their query plans
+    return metrics.slow_queries()
+
+
+def event_stats(req):
+    _admin(req)
+    return events.bus.stats()
+
+
+def prometheus_metrics(req):
+    # Not token-protected; METRICS_TOKEN, if set, must be sent as a bearer token
+    token = req.config.get('METRICS_TOKEN')
+    if token and req.headers.get('Authorization') != f'Bearer {token}':
+        raise ApiError(401, message='Unauthorized')
+    return Reply(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+# --- Change feed ---
+
+def event_stream(req):
+    # Admins see every leave change, employees only their own. The stream holds
+    # no database connection; events are small deltas published by the write paths.
+    if req.user['role'] == 'admin':
+        return EventStream((events.ADMIN_TOPIC,))
+    return EventStream((events.employee_topic(_employee_id(req)),))
+
+
+# --- Employee ---
+
+def employee_profile(req):
+    emp_id = _employee_id(req)
+
+    conn = req.conn
+    # The employee's change version is the ETag; a matching If-None-Match gets a 304
+    version = employee_version(conn, emp_id)
+    if version is None:
+        raise ApiError(404, message='Profile not found')
+
+    def build():
+        data = dict(conn.execute(f'SELECT {EMPLOYEE_SELECT} FROM employees WHERE id = ?', (emp_id,)).fetchone())
+        data['leave_balance'] = get_balance(conn, emp_id)
+        return data
+
+    return _conditional(req, f'profile-{emp_id}-v{version}', build)
+
+
+def employee_leaves(req):
+    emp_id = req.user.get('user_id')
+    conn = req.conn
+    version = employee_version(conn, emp_id)
+
+    def build():
+        leaves = conn.execute(f'SELECT {LEAVE_SELECT} FROM leaves WHERE employee_id = ? ORDER BY applied_on DESC',
+                              (emp_id,)).fetchall()
+        return [dict(row) for row in leaves]
+
+    if version is None:
+        return build()
+    return _conditional(req, f'leaves-{emp_id}-v{version}', build)
+
+
+def apply_leave(req):
+    emp_id = req.user.get('user_id')
+    data = req.json or {}
+
+    # Balance check and insert run in one serialized transaction (leaves.submit_leave).
+    # leave_days is counted from the dates in working days; a client-sent value is ignored.
+    try:
+        leave = submit_leave(req.conn, emp_id, data.get('start_date'), data.get('end_date'), data.get('reason'))
+    except InsufficientBalance:
+        raise ApiError(400, message='Insufficient balance')
+    except OverlappingLeave as e:
+        raise ApiError(409, message=str(e), overlapping_leave_id=e.leave['leave_id'])
+    except LeaveError as e:
+        raise ApiError(400, message=str(e))
+
+    # Subscribers get the row as stored (canonical dates, reason), not the request body
+    events.publish_leave('leave_applied', emp_id, leave)
+    return {'message': 'Leave applied successfully', 'leave_days': leave['leave_days'],
+            'new_balance': leave['remaining_days']}
+
+
+# (rule, methods, handler, auth): auth is 'token', 'query_token' (also accepts
+# ?token=, for EventSource) or None for public routes.
+ROUTES = (
+    ('/api/login', ['POST'], login, None),
+    ('/metrics', ['GET'], prometheus_metrics, None),
+
+    ('/api/admin/employees', ['GET'], list_employees, 'token'),
+    ('/api/admin/employees', ['POST'], add_employee, 'token'),
+    ('/api/admin/employees/search', ['GET'], search_employees, 'token'),
+    ('/api/admin/employees/import', ['POST'], import_employees, 'token'),
+    ('/api/admin/employees/details', ['GET'], employees_details, 'token'),
+    ('/api/admin/employees/<int:emp_id>', ['GET'], employee_details, 'token'),
+    ('/api/admin/employees/<int:emp_id>', ['PATCH'], update_employee, 'token'),
+    ('/api/admin/employees/<int:emp_id>', ['DELETE'], delete_employee, 'token'),
+    ('/api/admin/employees/<int:emp_id>/revoke', ['POST'], revoke_employee_tokens, 'token'),
+
+    ('/api/admin/leaves', ['GET'], list_leaves, 'token'),
+    ('/api/admin/leaves', ['PATCH'], update_leave_status_bulk, 'token'),
+    ('/api/admin/leaves/export', ['GET'], export_leaves, 'token'),
+    ('/api/admin/leaves/overlaps', ['GET'], overlapping_leaves, 'token'),
+    ('/api/admin/leaves/<int:leave_id>', ['PATCH'], update_leave_status, 'token'),
+
+    ('/api/admin/summary', ['GET'], admin_summary, 'token'),
+    ('/api/admin/calendar', ['GET'], leave_calendar, 'token'),
+    ('/api/admin/db/stats', ['GET'], db_stats, 'token'),
+    ('/api/admin/cache/stats', ['GET'], cache_stats, 'token'),
+    ('/api/admin/auth/stats', ['GET'], auth_stats, 'token'),
+    ('/api/admin/metrics/slow-queries', ['GET'], slow_queries, 'token'),
+    ('/api/admin/events/stats', ['GET'], event_stats, 'token'),
+
+    ('/api/events', ['GET'], event_stream, 'query_token'),
+
+    ('/api/employee/profile', ['GET'], employee_profile, 'token'),
+    ('/api/employee/leaves', ['GET'], employee_leaves, 'token'),
+    ('/api/employee/leaves', ['POST'], apply_leave, 'token'),
+)
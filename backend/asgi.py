@@ -0,0 +1,194 @@
+"""Async serving mode: the /api routes of server.py on Quart.
+
+Run with an ASGI server from backend/, e.g.
+
+    hypercorn asgi:app --bind 0.0.0.0:5000
+
+The handlers are the same synchronous functions server.py serves (api.py),
+using the same sqlite3 pool; each one runs on a worker thread (asyncio.to_thread), so the event loop never blocks
+on SQLite or password hashing, and the locking and retry behaviour of the
+write paths is identical in both apps. Only the token revocation check and
+the leave export stream query through aiosqlite (adb.py) from the loop.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from quart import Quart, Response, request, jsonify
+from quart_cors import cors
+
+import adb
+import api
+import auth
+import cache
+import events
+import export
+import metrics
+import migrations
+import passwords
+import workdays
+from auth import check_revoked, decode_token, request_token, token_subject
+from db import PoolTimeout, connection, pool, pool_size
+from pagination import QueryError
+
+app = Quart(__name__)
+app = cors(app, allow_origin='*')
+app.config['SECRET_KEY'] = 'your_secret_key_here'  # In a real app, use an environment variable
+# Handlers run on a pool of this many threads; every one may hold a pooled connection
+app.config['REQUEST_THREADS'] = 32
+app.config['DB_POOL_SIZE'] = pool_size(app.config['REQUEST_THREADS'])
+
+adb.init_app(app)
+auth.init_app(app)
+passwords.init_app(app)
+cache.init_app(app)
+events.init_app(app)
+metrics.init_app(app)
+workdays.init_app(app)
+with connection() as conn:
+    migrations.migrate(conn)
+
+
+def token_required(f=None, allow_query_token=False):
+    """auth.token_required for coroutine views."""
+    if f is None:
+        return lambda fn: token_required(fn, allow_query_token)
+
+    @wraps(f)
+    async def decorated(*args, **kwargs):
+        token = request_token(request.headers, request.args, allow_query_token)
+        if not token:
+            return jsonify({'message': 'Token is missing!'}), 401
+        try:
+            current_user = decode_token(token, app.config['SECRET_KEY'])
+            row = await adb.fetchone(auth.REVOKED_AT_SQL, (str(token_subject(current_user)),))
+            check_revoked(current_user, row[0] if row else None)
+        except PoolTimeout:
+            raise  # Busy, not unauthorized: the app answers 503
+        except Exception as e:
+            return jsonify({'message': 'Token is invalid!', 'error': str(e)}), 401
+        return await f(current_user, *args, **kwargs)
+    return decorated
+
+
+@app.errorhandler(QueryError)
+async def handle_query_error(e):
+    return jsonify({'message': str(e)}), 400
+
+@app.errorhandler(api.ApiError)
+async def handle_api_error(e):
+    return jsonify(e.body), e.status
+
+@app.errorhandler(PoolTimeout)
+async def handle_pool_timeout(e):
+    return jsonify({'message': 'Server busy, please retry'}), 503
+
+@app.before_serving
+async def size_handler_threads():
+    # asyncio.to_thread runs on the loop's default executor; give it the threads the pool was sized for
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(app.config['REQUEST_THREADS']))
+
+@app.before_request
+async def start_metrics():
+    metrics.start_request(request.url_rule.rule if request.url_rule else 'unmatched', request.method)
+
+@app.after_request
+async def finish_metrics(response):
+    metrics.finish_request(response.status_code)
+    return response
+
+@app.teardown_request
+async def fail_metrics(exc):
+    if exc is not None:
+        metrics.finish_request(500)
+
+# --- Routes ---
+# The handlers live in api.py and are shared with server.py; this module only
+# turns Quart requests into api.ApiRequest, runs the handler off the event
+# loop and turns its result into a response.
+
+async def api_request(current_user=None):
+    # The body is read here, on the loop; the handler's thread borrows and returns the connection
+    return api.ApiRequest(current_user, request.args, await request.get_json(silent=True),
+                          await request.get_data(as_text=True), await request.files, request.mimetype,
+                          request.headers, request.if_none_match, app.config,
+                          connect=pool.acquire, release=pool.release)
+
+
+async def call(handler, req, kwargs):
+    def run():
+        try:
+            return handler(req, **kwargs)
+        finally:
+            req.close()
+    return await asyncio.to_thread(run)
+
+
+def respond(result):
+    result = api.reply(result)
+    if isinstance(result, api.Export):
+        async def body():
+            # The pooled connection is held until the last batch is sent
+            async with adb.aconnection() as conn:
+                async with conn.execute(result.sql, result.params) as cursor:
+                    async for chunk in export.astream(cursor, result.fmt):
+                        yield chunk.encode()
+
+        response = Response(body(), mimetype=result.mimetype)
+        response.headers.update(result.headers)
+        response.timeout = None
+        return response
+    if isinstance(result, api.EventStream):
+        try:
+            sub = events.async_subscribe(result.topics)
+        except events.TooManyStreams as e:
+            return jsonify({'message': str(e)}), 503
+
+        async def body():
+            async for chunk in events.astream(sub):
+                yield chunk.encode()
+
+        response = Response(body(), mimetype=result.mimetype)
+        response.headers.update(result.headers)
+        response.timeout = None
+        return response
+
+    if result.status == 304:
+        response = Response('', status=304)
+    elif result.mimetype:
+        response = Response(result.body, status=result.status, mimetype=result.mimetype)
+    else:
+        response = jsonify(result.body)
+        response.status_code = result.status
+    if result.etag:
+        response.set_etag(result.etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def db_stats(req):
+    # This app also has the aiosqlite pool
+    return dict(api.db_stats(req), async_pool=adb.apool.stats())
+
+
+HANDLERS = {api.db_stats: db_stats}
+
+
+def view(handler, auth_mode):
+    handler = HANDLERS.get(handler, handler)
+    if auth_mode is None:
+        async def public_view(**kwargs):
+            return respond(await call(handler, await api_request(), kwargs))
+        return public_view
+
+    @token_required(allow_query_token=auth_mode == 'query_token')
+    async def protected_view(current_user, **kwargs):
+        return respond(await call(handler, await api_request(current_user), kwargs))
+    return protected_view
+
+
+for rule, methods, handler, auth_mode in api.ROUTES:
+    app.add_url_rule(rule, handler.__name__, view(handler, auth_mode), methods=methods)
+
+if __name__ == '__main__':
+    app.run(port=5000)
@@ -0,0 +1,194 @@
+import datetime
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import jwt
+from flask import current_app, request, jsonify
+
+from db import PoolTimeout, get_db
+
+
+class TokenCache:
+    """Bounded LRU of decoded JWT claims keyed by the SHA-256 of the token.
+
+    Entries expire at the token's own exp or after ttl seconds, whichever is
+    first. The cache only saves signature checks; whether a token has been
+    revoked is looked up in token_revocations on every request, so a
+    revocation made by any worker process applies to all of them.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'invalidated': 0}
+
+    def get(self, digest):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            claims, expires_at = entry
+            if now >= expires_at:
+                del self._entries[digest]
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(digest)
+            self._stats['hits'] += 1
+            return claims
+
+    def put(self, digest, claims):
+        expires_at = time.time() + self.ttl
+        if 'exp' in claims:
+            expires_at = min(expires_at, claims['exp'])
+        with self._lock:
+            self._entries[digest] = (claims, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, subject):
+        """Drop this process's cached tokens for subject (an employee id or 'admin')."""
+        with self._lock:
+            stale = [digest for digest, (claims, _) in self._entries.items() if token_subject(claims) == subject]
+            for digest in stale:
+                del self._entries[digest]
+            self._stats['invalidated'] += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data['size'] = len(self._entries)
+            data['maxsize'] = self.maxsize
+        lookups = data['hits'] + data['misses']
+        data['hit_rate'] = round(data['hits'] / lookups, 4) if lookups else 0.0
+        return data
+
+
+token_cache = TokenCache()
+
+
+def token_subject(claims):
+    return claims.get('user_id', claims.get('user'))
+
+
+# A revoked subject's tokens issued before revoked_at are rejected. Both are
+# whole seconds (PyJWT encodes iat that way), so a token issued in the same
+# second as the revocation, such as an immediate re-login, stays valid.
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS token_revocations (
+        subject TEXT PRIMARY KEY,
+        revoked_at INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+)
+
+REVOKED_AT_SQL = 'SELECT revoked_at FROM token_revocations WHERE subject = ?'
+
+REVOKE_SQL = """
+    INSERT INTO token_revocations (subject, revoked_at) VALUES (?, ?)
+    ON CONFLICT (subject) DO UPDATE SET revoked_at = excluded.revoked_at
+"""
+
+
+def revocation(subject):
+    """REVOKE_SQL parameters for revoking subject's tokens as of now."""
+    return str(subject), int(time.time())
+
+
+def revoke(conn, subject):
+    """Reject every token issued to subject so far, in every worker. Caller commits.
+
+    Returns the number of tokens dropped from this process's cache.
+    """
+    conn.execute(REVOKE_SQL, revocation(subject))
+    return token_cache.invalidate(subject)
+
+
+def check_revoked(claims, revoked_at):
+    """Raise InvalidTokenError if claims were issued before revoked_at (None: never revoked)."""
+    if revoked_at is not None and claims.get('iat', 0) < revoked_at:
+        raise jwt.InvalidTokenError('Token has been revoked')
+
+
+def revoked_at(conn, claims):
+    row = conn.execute(REVOKED_AT_SQL, (str(token_subject(claims)),)).fetchone()
+    return row[0] if row else None
+
+
+TOKEN_LIFETIME = datetime.timedelta(hours=24)
+
+
+def issue_token(secret_key, **claims):
+    now = datetime.datetime.utcnow()
+    return jwt.encode(dict(claims, iat=now, exp=now + TOKEN_LIFETIME), secret_key)
+
+
+def request_token(headers, args, allow_query_token=False):
+    """The raw JWT from "Authorization: Bearer <token>" (or ?token=), or None."""
+    token = headers.get('Authorization')
+    if not token and allow_query_token:
+        token = args.get('token')
+    if token and token.startswith('Bearer '):
+        token = token.split(' ')[1]
+    return token
+
+
+def decode_token(token, secret_key=None):
+    """Return the claims for token, verifying it only on a cache miss.
+
+    Revocation is not checked here; callers pass the claims to
+    check_revoked() with the subject's revoked_at from the database.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(digest)
+    if claims is None:
+        claims = jwt.decode(token, secret_key or current_app.config['SECRET_KEY'], algorithms=["HS256"])
+        token_cache.put(digest, claims)
+    return claims
+
+
+def init_app(app):
+    token_cache.maxsize = app.config.get('AUTH_CACHE_SIZE', 10000)
+    token_cache.ttl = app.config.get('AUTH_CACHE_TTL', 300.0)
+    token_cache.clear()
+
+
+# --- Authentication Decorator ---
+def token_required(f=None, allow_query_token=False):
+    """Pass the decoded claims as the first argument or return 401.
+
+    allow_query_token also accepts ?token= for clients that cannot set headers
+    (EventSource); keep it to endpoints that need it so tokens stay out of URLs.
+    """
+    if f is None:
+        return lambda fn: token_required(fn, allow_query_token)
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = request_token(request.headers, request.args, allow_query_token)
+        if not token:
+            return jsonify({'message': 'Token is missing!'}), 401
+        try:
+            current_user = decode_token(token)
+            check_revoked(current_user, revoked_at(get_db(), current_user))
+        except PoolTimeout:
+            raise  # Busy, not unauthorized: the app answers 503
+        except Exception as e:
+            return jsonify({'message': 'Token is invalid!', 'error': str(e)}), 401
+        return f(current_user, *args, **kwargs)
+    return decorated
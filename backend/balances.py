@@ -0,0 +1,136 @@
+import sys
+
+from db import connection
+
+# Balance for an employee with no leave history
+DEFAULT_BALANCE = 20
+
+# balances holds one row per employee with leave history: the remaining_days of
+# their most recent leave, or the balance set by a later accrual run
+# (accrual.py). Triggers on leaves keep it in step inside the same
+# transaction as the write, so a balance read is a primary-key lookup.
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS balances (
+        employee_id INTEGER PRIMARY KEY,
+        remaining_days INTEGER NOT NULL,
+        last_leave_id INTEGER NOT NULL,
+        FOREIGN KEY(employee_id) REFERENCES employees(id)
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_balances_leave_insert AFTER INSERT ON leaves
+    BEGIN
+        INSERT INTO balances (employee_id, remaining_days, last_leave_id)
+        VALUES (NEW.employee_id, NEW.remaining_days, NEW.leave_id)
+        ON CONFLICT (employee_id) DO UPDATE SET
+            remaining_days = excluded.remaining_days,
+            last_leave_id = excluded.last_leave_id
+        WHERE excluded.last_leave_id >= balances.last_leave_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_balances_leave_update AFTER UPDATE OF employee_id, remaining_days ON leaves
+    BEGIN
+        DELETE FROM balances WHERE employee_id IN (OLD.employee_id, NEW.employee_id);
+        INSERT INTO balances (employee_id, remaining_days, last_leave_id)
+        SELECT employee_id, remaining_days, leave_id FROM leaves
+        WHERE leave_id IN (
+            SELECT MAX(leave_id) FROM leaves WHERE employee_id IN (OLD.employee_id, NEW.employee_id) GROUP BY employee_id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_balances_leave_delete AFTER DELETE ON leaves
+    BEGIN
+        DELETE FROM balances WHERE employee_id = OLD.employee_id;
+        INSERT INTO balances (employee_id, remaining_days, last_leave_id)
+        SELECT employee_id, remaining_days, leave_id FROM leaves
+        WHERE employee_id = OLD.employee_id
+        ORDER BY leave_id DESC LIMIT 1;
+    END
+    """,
+)
+
+LATEST_LEAVES = """
+    SELECT l.employee_id, l.remaining_days, l.leave_id
+    FROM leaves l
+    JOIN (SELECT employee_id, MAX(leave_id) AS leave_id FROM leaves GROUP BY employee_id) latest
+      ON l.leave_id = latest.leave_id
+"""
+
+
+def get_balance(conn, emp_id):
+    row = conn.execute('SELECT remaining_days FROM balances WHERE employee_id = ?', (emp_id,)).fetchone()
+    return row[0] if row else DEFAULT_BALANCE
+
+
+def _latest_adjustments(conn):
+    """{employee_id: (new_balance, last_leave_id)} of each employee's latest accrual adjustment."""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'balance_adjustments'").fetchone():
+        return {}
+    return {row[0]: (row[1], row[2]) for row in conn.execute("""
+        SELECT a.employee_id, a.new_balance, a.last_leave_id FROM balance_adjustments a
+        WHERE a.id = (SELECT MAX(id) FROM balance_adjustments WHERE employee_id = a.employee_id)
+    """)}
+
+
+def expected_balances(conn):
+    """{employee_id: (remaining_days, last_leave_id)} implied by the leaves history.
+
+    That is the remaining_days of the latest leave, unless an accrual run
+    (accrual.py) set a new balance after it.
+    """
+    expected = {row[0]: (row[1], row[2]) for row in conn.execute(LATEST_LEAVES)}
+    for emp_id, (balance, last_leave_id) in _latest_adjustments(conn).items():
+        if emp_id not in expected or last_leave_id >= expected[emp_id][1]:
+            expected[emp_id] = (balance, last_leave_id)
+    return expected
+
+
+def verify(conn):
+    """Compare balances against the leaves history. Returns a list of drifted rows."""
+    expected = expected_balances(conn)
+    stored = {row[0]: (row[1], row[2]) for row in conn.execute('SELECT employee_id, remaining_days, last_leave_id FROM balances')}
+    drift = []
+    for emp_id in sorted(expected.keys() | stored.keys()):
+        want, have = expected.get(emp_id), stored.get(emp_id)
+        if want != have:
+            drift.append({
+                'employee_id': emp_id,
+                'stored': have[0] if have else None,
+                'expected': want[0] if want else None,
+            })
+    return drift
+
+
+def rebuild(conn):
+    """Recompute every balance from the leaves history in bulk. Caller commits."""
+    drift = verify(conn)
+    conn.execute('DELETE FROM balances')
+    conn.executemany('INSERT INTO balances (employee_id, remaining_days, last_leave_id) VALUES (?, ?, ?)',
+                     [(emp_id, balance, leave_id) for emp_id, (balance, leave_id) in expected_balances(conn).items()])
+    return drift
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'verify'
+    if command not in ('verify', 'rebuild'):
+        print("Usage: python backend/balances.py [verify|rebuild]")
+        sys.exit(2)
+
+    with connection() as conn:
+        if command == 'rebuild':
+            drift = rebuild(conn)
+            conn.commit()
+        else:
+            drift = verify(conn)
+
+    print(f"Balances drifted from leave history: {len(drift)}")
+    print("-" * 60)
+    for row in drift:
+        print(f"Employee ID: {row['employee_id']}, Stored: {row['stored']}, Expected: {row['expected']}")
+    if command == 'rebuild' and drift:
+        print("\nBalances rebuilt from leave history.")
+    if command == 'verify' and drift:
+        sys.exit(1)
@@ -0,0 +1,357 @@
+"""Benchmark every /api route through the Flask test client and over real HTTP.
+
+Each route in ROUTES gets --requests calls from --concurrency threads, or
+--slow-requests for routes that hash passwords or return whole tables. Each
+route reports throughput and latency percentiles. The client transport runs
+the app in-process, so it measures handlers without the network. The http
+transport runs it under --server (sync, async or gunicorn). Every transport
+gets its own scratch copy of --db, because the write routes change data.
+
+    python backend/bench/gen_data.py /tmp/lms-big.db --employees 50000 --years 5
+    python backend/bench/bench_api.py --db /tmp/lms-big.db --transport client,http --out before.json
+    python backend/bench/bench_api.py --compare before.json after.json
+
+Results are written as JSON together with the git commit and database size,
+so runs from different commits can be compared.
+"""
+import argparse
+import datetime
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, namedtuple
+from urllib.parse import quote
+
+from harness import BACKEND_DIR, request, start, stop, summarise
+
+sys.path.insert(0, BACKEND_DIR)
+
+# make(ctx, i) -> (path, role or emp_id, body, content_type)
+Route = namedtuple('Route', 'name method rule make slow', defaults=(False,))
+
+# Routes that are deliberately not benchmarked, with the reason
+SKIPPED = {
+    '/api/events': 'long-lived event stream; it has no request latency to measure',
+}
+
+
+def _pick(items, i):
+    return items[i % len(items)]
+
+
+def _new_employee(i):
+    return {'name': f'Bench {i}', 'gender': 'Female', 'age': 30, 'position': 'Tester', 'department': 'QA',
+            'phone': '+920000000000', 'email': f'bench{i}@company.com', 'status': 'Active'}
+
+
+def _apply(ctx, i):
+    # A distinct working day per request, so one employee's applications never overlap
+    day = _pick(ctx.apply_days, i)
+    return ('/api/employee/leaves', _pick(ctx.apply_ids, i),
+            {'start_date': day, 'end_date': day, 'reason': 'Benchmark'}, None)
+
+
+ROUTES = [
+    Route('login', 'POST', '/api/login',
+          lambda ctx, i: ('/api/login', None, {'username': f'user{_pick(ctx.login_ids, i)}',
+                                               'password': f'pass{_pick(ctx.login_ids, i)}'}, None), slow=True),
+    Route('employees', 'GET', '/api/admin/employees',
+          lambda ctx, i: ('/api/admin/employees', 'admin', None, None), slow=True),
+    Route('employees_page', 'GET', '/api/admin/employees',
+          lambda ctx, i: ('/api/admin/employees?limit=100&department=IT', 'admin', None, None)),
+    Route('employee_search', 'GET', '/api/admin/employees/search',
+          lambda ctx, i: (f"/api/admin/employees/search?q={quote(('ha', 'sara kh', 'data eng', 'usman')[i % 4])}&limit=20",
+                          'admin', None, None)),
+    Route('employee_detail', 'GET', '/api/admin/employees/<int:emp_id>',
+          lambda ctx, i: (f'/api/admin/employees/{_pick(ctx.employee_ids, i)}', 'admin', None, None)),
+    Route('employee_details', 'GET', '/api/admin/employees/details',
+          lambda ctx, i: ('/api/admin/employees/details?history_limit=10&ids='
+                          + ','.join(str(_pick(ctx.employee_ids, i * 50 + k)) for k in range(50)), 'admin', None, None)),
+    Route('employee_update', 'PATCH', '/api/admin/employees/<int:emp_id>',
+          lambda ctx, i: (f'/api/admin/employees/{_pick(ctx.employee_ids, i)}', 'admin',
+                          {'position': f'Position {i % 7}'}, None)),
+    Route('employee_add', 'POST', '/api/admin/employees',
+          lambda ctx, i: ('/api/admin/employees', 'admin', _new_employee(i), None), slow=True),
+    Route('employee_delete', 'DELETE', '/api/admin/employees/<int:emp_id>',
+          lambda ctx, i: (f'/api/admin/employees/{_pick(ctx.created or ctx.spare_ids, i)}', 'admin', None, None), slow=True),
+    Route('employee_import', 'POST', '/api/admin/employees/import',
+          lambda ctx, i: ('/api/admin/employees/import', 'admin', [_new_employee(f'{i}a'), _new_employee(f'{i}b')], None),
+          slow=True),
+    Route('employee_revoke', 'POST', '/api/admin/employees/<int:emp_id>/revoke',
+          lambda ctx, i: (f'/api/admin/employees/{_pick(ctx.spare_ids, i)}/revoke', 'admin', None, None)),
+    Route('leaves', 'GET', '/api/admin/leaves',
+          lambda ctx, i: ('/api/admin/leaves', 'admin', None, None), slow=True),
+    Route('leaves_page', 'GET', '/api/admin/leaves',
+          lambda ctx, i: ('/api/admin/leaves?limit=100&status=Approved&department=HR', 'admin', None, None)),
+    Route('leaves_export', 'GET', '/api/admin/leaves/export',
+          lambda ctx, i: ('/api/admin/leaves/export?format=ndjson', 'admin', None, None), slow=True),
+    Route('leave_status', 'PATCH', '/api/admin/leaves/<int:leave_id>',
+          lambda ctx, i: (f'/api/admin/leaves/{_pick(ctx.leave_ids, i)}', 'admin',
+                          {'status': ('Approved', 'Rejected')[i % 2]}, None)),
+    Route('leave_status_bulk', 'PATCH', '/api/admin/leaves',
+          lambda ctx, i: ('/api/admin/leaves', 'admin',
+                          {'status': ('Approved', 'Rejected')[i % 2],
+                           'leave_ids': [_pick(ctx.leave_ids, i * 50 + k) for k in range(50)]}, None)),
+    Route('leave_overlaps', 'GET', '/api/admin/leaves/overlaps',
+          lambda ctx, i: ('/api/admin/leaves/overlaps', 'admin', None, None)),
+    Route('calendar', 'GET', '/api/admin/calendar',
+          lambda ctx, i: (f'/api/admin/calendar?from={ctx.today.year - 2 + i % 3}-01-01&to={ctx.today.year - 2 + i % 3}-12-31',
+                          'admin', None, None)),
+    Route('calendar_day', 'GET', '/api/admin/calendar',
+          lambda ctx, i: (f'/api/admin/calendar?department=IT&day={ctx.today - datetime.timedelta(days=i % 30)}',
+                          'admin', None, None)),
+    Route('summary', 'GET', '/api/admin/summary',
+          lambda ctx, i: (f'/api/admin/summary?top={10 + i % 3}', 'admin', None, None)),
+    Route('db_stats', 'GET', '/api/admin/db/stats', lambda ctx, i: ('/api/admin/db/stats', 'admin', None, None)),
+    Route('cache_stats', 'GET', '/api/admin/cache/stats',
+          lambda ctx, i: ('/api/admin/cache/stats', 'admin', None, None)),
+    Route('auth_stats', 'GET', '/api/admin/auth/stats', lambda ctx, i: ('/api/admin/auth/stats', 'admin', None, None)),
+    Route('event_stats', 'GET', '/api/admin/events/stats',
+          lambda ctx, i: ('/api/admin/events/stats', 'admin', None, None)),
+    Route('slow_queries', 'GET', '/api/admin/metrics/slow-queries',
+          lambda ctx, i: ('/api/admin/metrics/slow-queries', 'admin', None, None)),
+    Route('profile', 'GET', '/api/employee/profile',
+          lambda ctx, i: ('/api/employee/profile', _pick(ctx.employee_ids, i), None, None)),
+    Route('my_leaves', 'GET', '/api/employee/leaves',
+          lambda ctx, i: ('/api/employee/leaves', _pick(ctx.employee_ids, i), None, None)),
+    Route('apply', 'POST', '/api/employee/leaves', _apply),
+]
+
+
+class Context:
+    """Ids and tokens the request factories draw from, read from the scratch database."""
+
+    def __init__(self, db_path, secret_key):
+        from auth import issue_token
+        from days import from_day, to_day
+        from workdays import calendar
+
+        conn = sqlite3.connect(db_path)
+        ids = [row[0] for row in conn.execute('SELECT id FROM employees ORDER BY id')]
+        self.login_ids = [row[0] for row in conn.execute('SELECT employee_id FROM employee_users ORDER BY employee_id LIMIT 10')]
+        # Tokens for these employees are used throughout, so none of them is revoked or deleted
+        self.employee_ids = ids[:200:2]
+        self.spare_ids = ids[1:200:2]
+        self.apply_ids = [row[0] for row in conn.execute(
+            'SELECT e.id FROM employees e LEFT JOIN balances b ON b.employee_id = e.id '
+            'WHERE COALESCE(b.remaining_days, 20) >= 10 ORDER BY e.id DESC LIMIT 50')]
+        self.leave_ids = [row[0] for row in conn.execute('SELECT leave_id FROM leaves ORDER BY leave_id DESC LIMIT 5000')]
+        self.counts = {'employees': len(ids), 'leaves': conn.execute('SELECT COUNT(*) FROM leaves').fetchone()[0]}
+        conn.close()
+
+        last = max(ids) if ids else 0
+        self.today = datetime.date.today()
+        self.apply_from = self.today + datetime.timedelta(days=3650 + last % 1000)
+        first = to_day(self.apply_from)
+        self.apply_days = [from_day(day) for day in range(first, first + 3650) if calendar.count(day, day)]
+        self.created = []
+        self.tokens = {'admin': issue_token(secret_key, user='admin', role='admin')}
+        for emp_id in set(self.employee_ids) | set(self.apply_ids):
+            self.tokens[emp_id] = issue_token(secret_key, user_id=emp_id, username=f'user{emp_id}', role='employee')
+
+
+class ClientTransport:
+    name = 'client'
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, method, path, token, body, content_type):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        kwargs = {'data': body, 'content_type': content_type} if content_type else {'json': body}
+        response = self.client.open(path, method=method, headers=headers, **kwargs)
+        data = response.get_data()
+        return response.status_code, data
+
+    def close(self):
+        pass
+
+
+class HttpTransport:
+    name = 'http'
+
+    def __init__(self, db_path, server, workers):
+        self.process, self.port = start(server, db_path, workers)
+        self._local = threading.local()
+
+    def send(self, method, path, token, body, content_type):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=300)
+        headers = {'Content-Type': content_type} if content_type else {}
+        try:
+            return request(conn, method, path, token, body, headers)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            return 0, b''
+
+    def close(self):
+        stop(self.process)
+
+
+def bench_route(transport, ctx, route, requests, concurrency, warmup):
+    counter = itertools.count()
+    latencies, statuses = [], Counter()
+    lock = threading.Lock()
+
+    def call(i):
+        path, who, body, content_type = route.make(ctx, i)
+        started = time.perf_counter()
+        status, data = transport.send(route.method, path, ctx.tokens.get(who), body, content_type)
+        elapsed = (time.perf_counter() - started) * 1000
+        if route.name == 'employee_add' and status < 300:
+            ctx.created.append(json.loads(data)['id'])
+        return status, elapsed
+
+    for _ in range(warmup):
+        call(next(counter))
+
+    def worker():
+        local, seen = [], Counter()
+        while True:
+            i = next(counter)
+            if i >= requests + warmup:
+                break
+            status, elapsed = call(i)
+            local.append(elapsed)
+            seen[status] += 1
+        with lock:
+            latencies.extend(local)
+            statuses.update(seen)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    errors = sum(count for status, count in statuses.items() if not 200 <= status < 400)
+    return dict(summarise(latencies, elapsed, errors), statuses={str(k): v for k, v in sorted(statuses.items())})
+
+
+def coverage(app, selected):
+    """/api rules of the app with no benchmark, minus the deliberate skips."""
+    rules = {(rule.rule, method) for rule in app.url_map.iter_rules() if rule.rule.startswith('/api')
+             for method in rule.methods - {'HEAD', 'OPTIONS'}}
+    covered = {(route.rule, route.method) for route in selected}
+    return sorted((rule, method) for rule, method in rules - covered if rule not in SKIPPED)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    for transport, routes in new['results'].items():
+        print(f'\n[{transport}]')
+        print(f"{'route':<20} {'req/s':>18} {'p50 ms':>20} {'p99 ms':>20}")
+        for name, result in routes.items():
+            before = old['results'].get(transport, {}).get(name)
+            cells = []
+            for key in ('rps', 'p50_ms', 'p99_ms'):
+                value = result.get(key)
+                if before and before.get(key) and value is not None:
+                    change = (value - before[key]) / before[key] * 100
+                    cells.append(f'{before[key]:>7} -> {value:<7} {change:+4.0f}%')
+                else:
+                    cells.append(f'{value}')
+            print(f'{name:<20} ' + ' '.join(f'{cell:>20}' for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--db', default=os.path.join(BACKEND_DIR, '..', 'leave_management_system.db'),
+                        help='database to copy for each transport (see gen_data.py)')
+    parser.add_argument('--transport', default='client,http', help='client, http or both')
+    parser.add_argument('--server', default='sync', choices=('sync', 'async', 'gunicorn'), help='HTTP server mode')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--slow-requests', type=int, default=20, help='requests per slow route')
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--routes', help='comma-separated route names (default: all)')
+    parser.add_argument('--out', help='JSON results file (default: bench-<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    selected = [route for route in ROUTES if not args.routes or route.name in args.routes.split(',')]
+    tmp = tempfile.mkdtemp()
+    results, counts = {}, None
+    try:
+        # The in-process app (client transport, token secret, route list) uses its own copy
+        os.environ['LMS_DB_PATH'] = os.path.join(tmp, 'client.db')
+        shutil.copy(args.db, os.environ['LMS_DB_PATH'])
+        import server
+        # Slow queries are expected on a large database and would drown the results
+        logging.getLogger('lms.sql').setLevel(logging.ERROR)
+
+        for name in args.transport.split(','):
+            if name == 'client':
+                db_path = os.environ['LMS_DB_PATH']
+                transport = ClientTransport(server.app)
+            else:
+                db_path = os.path.join(tmp, f'{name}.db')
+                shutil.copy(args.db, db_path)
+                transport = HttpTransport(db_path, args.server, args.workers)
+            try:
+                ctx = Context(db_path, server.app.config['SECRET_KEY'])
+                counts = ctx.counts
+                results[name] = {}
+                for route in selected:
+                    requests = args.slow_requests if route.slow else args.requests
+                    result = bench_route(transport, ctx, route, requests, args.concurrency, args.warmup)
+                    results[name][route.name] = result
+                    print(f"{name:<6} {route.name:<18} {result['rps']:>8} req/s  p50 {result.get('p50_ms')} ms  "
+                          f"p99 {result.get('p99_ms')} ms  errors {result['errors']}", flush=True)
+            finally:
+                transport.close()
+        missing = coverage(server.app, selected) if not args.routes else []
+    finally:
+        shutil.rmtree(tmp)
+
+    for rule, method in missing:
+        print(f'Not benchmarked: {method} {rule}')
+    commit = git_commit()
+    out = args.out or f'bench-{commit or "results"}.json'
+    meta = {
+        'commit': commit,
+        'at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'db': os.path.abspath(args.db),
+        'db_size': counts,
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'args': {key: value for key, value in vars(args).items() if key != 'compare'},
+    }
+    with open(out, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f'Results written to {out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Concurrent POST /api/employee/leaves load test.
+
+Fires --per-employee one-day applications for each of --employees fresh
+employees (starting balance 20) from --concurrency threads at once, then
+checks that nobody overdrew their balance: each employee gets exactly
+min(per_employee, 20) approvals, balances never go negative and every
+leave's remaining_days follows from the one before it. Each of an
+employee's applications is for a different working day, so none of them
+is rejected as an overlap.
+
+    python backend/bench/bench_apply.py --employees 20 --per-employee 30 --concurrency 16
+"""
+import argparse
+import datetime
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, BACKEND_DIR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--employees', type=int, default=20)
+    parser.add_argument('--per-employee', type=int, default=30)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, 'bench.db')
+    shutil.copy(os.path.join(BACKEND_DIR, '..', 'leave_management_system.db'), db_path)
+    os.environ['LMS_DB_PATH'] = db_path
+
+    import server
+    from balances import DEFAULT_BALANCE
+    from days import from_day, to_day
+    from workdays import calendar
+
+    client = server.app.test_client()
+    with server.db.connection() as conn:
+        emp_ids = []
+        for i in range(args.employees):
+            cursor = conn.execute("INSERT INTO employees (name, status) VALUES (?, 'Active')", (f'Bench {i}',))
+            emp_ids.append(cursor.lastrowid)
+        conn.commit()
+
+    exp = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    headers = {emp_id: {'Authorization': 'Bearer ' + jwt.encode(
+        {'user_id': emp_id, 'role': 'employee', 'iat': datetime.datetime.utcnow(), 'exp': exp},
+        server.app.config['SECRET_KEY'])} for emp_id in emp_ids}
+    # One distinct working day per application of an employee
+    workdays = []
+    day = to_day('2026-06-01')
+    while len(workdays) < args.per_employee:
+        if calendar.count(day, day):
+            workdays.append(from_day(day))
+        day += 1
+    jobs = [(emp_id, date) for emp_id in emp_ids for date in workdays]
+    random.Random(1).shuffle(jobs)
+
+    def submit(job):
+        emp_id, date = job
+        started = time.perf_counter()
+        response = client.post('/api/employee/leaves', headers=headers[emp_id], json={
+            'start_date': date, 'end_date': date, 'reason': 'bench'})
+        return emp_id, response.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(submit, jobs))
+    elapsed = time.perf_counter() - started
+
+    failures = []
+    expected = min(args.per_employee, DEFAULT_BALANCE)
+    with server.db.connection() as conn:
+        for emp_id in emp_ids:
+            accepted = sum(1 for e, status, _ in results if e == emp_id and status == 200)
+            rows = conn.execute('SELECT leave_days, remaining_days FROM leaves WHERE employee_id = ? ORDER BY leave_id',
+                                (emp_id,)).fetchall()
+            balance = DEFAULT_BALANCE
+            for leave_days, remaining in rows:
+                balance -= leave_days
+                if remaining != balance or remaining < 0:
+                    failures.append(f'employee {emp_id}: remaining_days {remaining}, expected {balance}')
+                    break
+            if accepted != expected or len(rows) != expected:
+                failures.append(f'employee {emp_id}: {accepted} accepted, {len(rows)} rows, expected {expected}')
+        stats = server.db.pool.stats()
+    shutil.rmtree(tmp)
+
+    statuses = {}
+    for _, status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = sorted(seconds * 1000 for _, _, seconds in results)
+    print(f"Submissions: {len(results)} from {args.concurrency} threads in {elapsed:.2f}s "
+          f"({len(results) / elapsed:.1f} req/s)")
+    print(f"Status codes: {statuses}, busy retries: {stats['busy_retries']}")
+    print(f"Latency ms: p50 {statistics.median(latencies):.1f}, "
+          f"p99 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]:.1f}")
+    if failures:
+        print("Invariant violated:")
+        for failure in failures:
+            print("  " + failure)
+        sys.exit(1)
+    print("Invariant holds: no balance overdrawn")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Requests/sec and latency of the sync (Flask/Werkzeug) and async (Quart/ASGI) apps.
+
+Starts each app as a real HTTP server on a scratch copy of
+leave_management_system.db, then drives both with the same mix of /api GET
+requests (plus optional logins, the slow path) from --concurrency keep-alive
+client threads for --duration seconds.
+
+    python backend/bench/bench_asgi.py --concurrency 32 --duration 10 --login-ratio 0.05
+
+The client runs on the same machine, so on small boxes it competes with the
+server for CPU; compare the two modes against each other, not as absolutes.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from harness import BACKEND_DIR, request, start, stop, summarise
+
+# (path, role); {emp} is the logged-in employee's id
+READS = [
+    ('/api/employee/profile', 'employee'),
+    ('/api/employee/leaves', 'employee'),
+    ('/api/admin/employees?limit=50', 'admin'),
+    ('/api/admin/leaves?limit=50&status=Approved', 'admin'),
+    ('/api/admin/employees/{emp}', 'admin'),
+    ('/api/admin/summary', 'admin'),
+]
+
+
+def run(mode, db_path, args):
+    process, port = start(mode, db_path)
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        _, data = request(conn, 'POST', '/api/login', body={'username': 'admin', 'password': 'admin123'})
+        admin = json.loads(data)['token']
+        emp_ids = list(range(2, 2 + args.employees))
+        employee = {}
+        for emp_id in emp_ids:
+            _, data = request(conn, 'POST', '/api/login', body={'username': f'user{emp_id}', 'password': f'pass{emp_id}'})
+            employee[emp_id] = json.loads(data)['token']
+        conn.close()
+
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+        stop_at = time.perf_counter() + args.duration
+
+        def client(seed):
+            rng = random.Random(seed)
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            local = []
+            while time.perf_counter() < stop_at:
+                emp_id = rng.choice(emp_ids)
+                started = time.perf_counter()
+                try:
+                    if rng.random() < args.login_ratio:
+                        status, _ = request(conn, 'POST', '/api/login',
+                                            body={'username': f'user{emp_id}', 'password': f'pass{emp_id}'})
+                    else:
+                        path, role = rng.choice(READS)
+                        token = admin if role == 'admin' else employee[emp_id]
+                        status, _ = request(conn, 'GET', path.format(emp=emp_id), token)
+                except (OSError, http.client.HTTPException):
+                    conn.close()
+                    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                    status = 0
+                if status == 200:
+                    local.append((time.perf_counter() - started) * 1000)
+                else:
+                    with lock:
+                        errors[0] += 1
+            conn.close()
+            with lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(args.concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        stop(process)
+
+    return dict(summarise(latencies, elapsed, errors[0]), mode=mode)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--login-ratio', type=float, default=0.0, help='fraction of requests that are logins')
+    parser.add_argument('--employees', type=int, default=20, help='distinct employee logins to spread reads over')
+    parser.add_argument('--modes', default='sync,async')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, 'bench.db')
+    shutil.copy(os.path.join(BACKEND_DIR, '..', 'leave_management_system.db'), db_path)
+    try:
+        results = [run(mode, db_path, args) for mode in args.modes.split(',')]
+    finally:
+        shutil.rmtree(tmp)
+
+    print(f"Concurrency {args.concurrency}, {args.duration:.0f}s per mode, login ratio {args.login_ratio}")
+    print(f"{'mode':<6} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for r in results:
+        print(f"{r['mode']:<6} {r['requests']:>9} {r['errors']:>7} {r['rps']:>8} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['max_ms']:>8}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
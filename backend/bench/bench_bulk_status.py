@@ -0,0 +1,75 @@
+"""Per-row PATCH /api/admin/leaves/<id> versus one batch PATCH /api/admin/leaves.
+
+Inserts --leaves Pending leaves into a scratch copy of the database, approves
+them one request (and one commit) per row, resets them, then approves them
+again with a single batch request. Prints rows/sec for each path.
+
+    python backend/bench/bench_bulk_status.py --leaves 2000
+"""
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import jwt
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, BACKEND_DIR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--leaves', type=int, default=2000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, 'bench.db')
+    shutil.copy(os.path.join(BACKEND_DIR, '..', 'leave_management_system.db'), db_path)
+    os.environ['LMS_DB_PATH'] = db_path
+
+    import server
+
+    client = server.app.test_client()
+    token = jwt.encode({'user': 'admin', 'role': 'admin', 'iat': datetime.datetime.utcnow(),
+                        'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1)},
+                       server.app.config['SECRET_KEY'])
+    headers = {'Authorization': 'Bearer ' + token}
+
+    with server.db.connection() as conn:
+        emp_id = conn.execute('SELECT MIN(id) FROM employees').fetchone()[0]
+        first = conn.execute('SELECT COALESCE(MAX(leave_id), 0) FROM leaves').fetchone()[0] + 1
+        conn.executemany("""
+            INSERT INTO leaves (employee_id, start_date, end_date, leave_days, remaining_days, reason, status, returned, applied_on)
+            VALUES (?, '2026-07-01', '2026-07-01', 1, 0, 'bench', 'Pending', 'No', '2026-06-01')
+        """, [(emp_id,)] * args.leaves)
+        conn.commit()
+    ids = list(range(first, first + args.leaves))
+
+    def reset():
+        with server.db.connection() as conn:
+            conn.execute("UPDATE leaves SET status = 'Pending', returned = 'No' WHERE leave_id >= ?", (first,))
+            conn.commit()
+
+    started = time.perf_counter()
+    for leave_id in ids:
+        client.patch(f'/api/admin/leaves/{leave_id}', headers=headers, json={'status': 'Approved'})
+    per_row = time.perf_counter() - started
+
+    reset()
+    started = time.perf_counter()
+    response = client.patch('/api/admin/leaves', headers=headers, json={'status': 'Approved', 'leave_ids': ids})
+    batch = time.perf_counter() - started
+    assert response.json['updated'] == args.leaves, response.json
+    shutil.rmtree(tmp)
+
+    print(f"Leaves: {args.leaves}")
+    print(f"Per-row PATCH: {per_row:.2f}s ({args.leaves / per_row:.0f} rows/s)")
+    print(f"Batch PATCH:   {batch:.3f}s ({args.leaves / batch:.0f} rows/s)")
+    print(f"Speed-up: {per_row / batch:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
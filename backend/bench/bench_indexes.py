@@ -0,0 +1,167 @@
+"""Show that the hot leaves queries do not full-scan with the migrated indexes.
+
+Builds a throwaway database with the production schema, fills leaves with
+--rows synthetic rows and runs migrations.migrate(). Each query in QUERIES
+calls the code the API and the Admin/ scripts run; its statements are
+captured with a trace callback. The bench prints their EXPLAIN QUERY PLAN and
+median timings without the leaves indexes the migrations create, then with
+them. Exits non-zero if any statement still scans the leaves table, or a
+keyset page still sorts its matches, with the indexes in place.
+
+    python backend/bench/bench_indexes.py --rows 2000000
+"""
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import migrations
+import reports
+from balances import get_balance
+from days import from_day, to_day
+from db import DB_PATH
+from filters import LEAVE_LIST_SELECT, LEAVE_SELECT, LEAVE_SOURCE, leave_filters
+from leaves import find_overlap
+from pagination import fetch_page
+
+STATUSES = (('Approved', 'No'), ('Approved', 'Yes'), ('Rejected', 'Yes'), ('Pending', 'No'))
+
+# label -> fn(conn, emp_id, today); today is a day number
+QUERIES = {
+    'balance': lambda conn, emp, today: get_balance(conn, emp),
+    'employee leaves': lambda conn, emp, today: conn.execute(
+        f'SELECT {LEAVE_SELECT} FROM leaves WHERE employee_id = ? ORDER BY applied_on DESC', (emp,)).fetchall(),
+    'overlap check': lambda conn, emp, today: find_overlap(conn, emp, today, today + 14),
+    'on leave (f2)': lambda conn, emp, today: reports.on_leave(conn),
+    'present (f3)': lambda conn, emp, today: reports.present(conn, limit=100),
+    'overdue (f4)': lambda conn, emp, today: reports.overdue(conn),
+    'pending (f9)': lambda conn, emp, today: reports.pending(conn),
+    'leaves page (status)': lambda conn, emp, today: leaves_page(conn, {'status': 'Approved', 'limit': '100'}),
+    'calendar': lambda conn, emp, today: reports.calendar(conn, from_day(today), from_day(today + 29)),
+}
+
+# Keyset pages must walk an index in key order rather than sort every match
+PAGED = ('leaves page (status)',)
+
+
+def leaves_page(conn, args):
+    """The /api/admin/leaves query: filters plus a keyset page ordered by leave_id."""
+    where, params = leave_filters(args)
+    return fetch_page(conn, LEAVE_LIST_SELECT, LEAVE_SOURCE, where, params, 'leave_id', 'l.leave_id', args)
+
+
+def copy_schema(conn):
+    source = sqlite3.connect(DB_PATH)
+    for (sql,) in source.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name IN ('employees', 'leaves')"):
+        conn.execute(sql)
+    source.close()
+
+
+def fill(conn, employees, rows):
+    conn.executemany('INSERT INTO employees (id, name, department, status) VALUES (?, ?, ?, ?)',
+                     ((i, f'Employee {i}', f'Dept {i % 20}', 'Active') for i in range(1, employees + 1)))
+    start = datetime.date(2015, 1, 1)
+
+    def leaves():
+        rng = random.Random(42)
+        for _ in range(rows):
+            begin = start + datetime.timedelta(days=rng.randrange(4000))
+            days = rng.randint(1, 10)
+            # Almost all history is closed; a small tail is still active or pending.
+            status, returned = STATUSES[1 if rng.random() < 0.7 else 2] if rng.random() < 0.99 else rng.choice(STATUSES)
+            yield (rng.randint(1, employees), begin.isoformat(), (begin + datetime.timedelta(days=days - 1)).isoformat(),
+                   days, rng.randint(0, 20), status, returned, (begin - datetime.timedelta(days=3)).isoformat())
+
+    conn.executemany("""
+        INSERT INTO leaves (employee_id, start_date, end_date, leave_days, remaining_days, status, returned, applied_on)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, leaves())
+    conn.commit()
+
+
+def statements(conn, fn):
+    """The SQL statements fn(conn) executes, with their parameters inlined."""
+    seen = []
+    conn.set_trace_callback(seen.append)
+    try:
+        fn(conn)
+    finally:
+        conn.set_trace_callback(None)
+    return [sql for sql in seen if not sql.lstrip().upper().startswith(('PRAGMA', 'BEGIN', 'COMMIT', 'ROLLBACK'))]
+
+
+def measure(conn, employees, repeat):
+    results = {}
+    rng = random.Random(7)
+    today = to_day(datetime.date.today())
+    for label, query in QUERIES.items():
+        def run(conn):
+            return query(conn, rng.randint(1, employees), today)
+        plan = ' | '.join(row[3] for sql in statements(conn, run) for row in conn.execute('EXPLAIN QUERY PLAN ' + sql))
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run(conn)
+            timings.append((time.perf_counter() - started) * 1000)
+        results[label] = (plan, statistics.median(timings))
+    return results
+
+
+def drop_indexes(conn):
+    """Drop the leaves indexes (the migrations create all of them); returns their CREATE statements."""
+    indexes = conn.execute("""
+        SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'leaves' AND sql IS NOT NULL
+    """).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX {name}')
+    conn.commit()
+    return [sql for _, sql in indexes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--employees', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.db'))
+        conn.row_factory = sqlite3.Row
+        copy_schema(conn)
+        print(f"Filling {args.rows} leaves for {args.employees} employees...")
+        fill(conn, args.employees, args.rows)
+
+        started = time.perf_counter()
+        migrations.migrate(conn)
+        print(f"Migrations applied in {time.perf_counter() - started:.1f}s")
+        indexes = drop_indexes(conn)
+        before = measure(conn, args.employees, args.repeat)
+        for sql in indexes:
+            conn.execute(sql)
+        conn.commit()
+        after = measure(conn, args.employees, args.repeat)
+        conn.close()
+
+    scans = 0
+    for label in QUERIES:
+        print(f"\n{label}")
+        for phase, (plan, ms) in (('without', before[label]), ('with', after[label])):
+            print(f"  {phase:<7} {ms:10.2f} ms  {plan}")
+        if 'SCAN l' in after[label][0] or 'SCAN leaves' in after[label][0]:
+            scans += 1
+        elif label in PAGED and 'TEMP B-TREE' in after[label][0]:
+            scans += 1
+    if scans:
+        print(f"\n{scans} queries still scan leaves or sort a keyset page")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
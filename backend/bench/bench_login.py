@@ -0,0 +1,74 @@
+"""Login throughput under a burst of concurrent POST /api/login calls.
+
+Runs against a scratch copy of leave_management_system.db through the Flask
+test client, so it measures the handler (DB lookup + password check + JWT)
+without network overhead. Reports logins/sec, latency percentiles and how
+many requests were shed with 503 when the hashing pool was saturated.
+
+    python backend/bench/bench_login.py --logins 400 --concurrency 32 --workers 4
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--logins', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=None, help='password hashing threads (default: CPU count)')
+    parser.add_argument('--max-pending', type=int, default=None)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, 'bench.db')
+    shutil.copy(os.path.join(BACKEND_DIR, '..', 'leave_management_system.db'), db_path)
+    os.environ['LMS_DB_PATH'] = db_path
+
+    import passwords
+    import server
+
+    passwords.hasher.configure(workers=args.workers, max_pending=args.max_pending)
+    client = server.app.test_client()
+    with server.db.connection() as conn:
+        ids = [row[0] for row in conn.execute('SELECT employee_id FROM employee_users ORDER BY employee_id')]
+
+    def login(i):
+        emp_id = ids[i % len(ids)]
+        started = time.perf_counter()
+        response = client.post('/api/login', json={'username': f'user{emp_id}', 'password': f'pass{emp_id}'})
+        return response.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - started
+    shutil.rmtree(tmp)
+
+    ok = [seconds * 1000 for status, seconds in results if status == 200]
+    shed = sum(1 for status, _ in results if status == 503)
+    failed = len(results) - len(ok) - shed
+    print(f"Hash workers: {passwords.hasher.workers}, max pending: {passwords.hasher.max_pending}, "
+          f"client concurrency: {args.concurrency}")
+    print(f"Logins: {len(ok)} ok, {shed} shed (503), {failed} failed in {elapsed:.2f}s")
+    print(f"Throughput: {len(ok) / elapsed:.1f} logins/sec")
+    if ok:
+        print(f"Latency ms: p50 {statistics.median(ok):.1f}, p95 {percentile(ok, 95):.1f}, "
+              f"p99 {percentile(ok, 99):.1f}, max {max(ok):.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Generate a large synthetic database with the leave_management_system.db schema.
+
+Fills employees, employee_users and leaves with --employees people and
+--years of leave history ending today, then applies backend/migrations.py
+(indexes, balances, version columns) so the result is what the server
+expects. The same --seed always produces the same data.
+
+    python backend/bench/gen_data.py /tmp/lms-big.db --employees 50000 --years 5
+
+Logins follow the usual user<id>/pass<id> scheme, but scrypt is too slow
+to hash every password. Only the first --hashed-logins employees can log in
+with pass<id>. Everyone else gets one shared hash.
+
+Each employee's entitlement restarts at balances.DEFAULT_BALANCE every
+calendar year. remaining_days never goes below zero.
+"""
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, BACKEND_DIR)
+
+from werkzeug.security import generate_password_hash
+
+SOURCE_DB = os.path.join(BACKEND_DIR, '..', 'leave_management_system.db')
+TABLES = ('employees', 'employee_users', 'leaves', 'admin_users')
+
+FIRST_NAMES = ('Hamza', 'Sara', 'Ali', 'Ayesha', 'Usman', 'Fatima', 'Bilal', 'Maham', 'Omar', 'Iqra', 'Zain',
+               'Laiba', 'Hassan', 'Hira', 'Ahmed', 'Noor', 'Fahad', 'Zara', 'Saad', 'Mariam')
+LAST_NAMES = ('Khan', 'Farooq', 'Siddiqui', 'Shah', 'Hassan', 'Qureshi', 'Malik', 'Raza', 'Iqbal', 'Butt',
+              'Chaudhry', 'Javed', 'Aslam', 'Mirza', 'Sheikh')
+DEPARTMENTS = {
+    'IT': ('Backend Developer', 'Frontend Developer', 'System Administrator', 'AI Engineer'),
+    'Data': ('Data Analyst', 'Data Engineer'),
+    'Design': ('UI/UX Designer', 'Graphic Designer'),
+    'HR': ('HR Executive', 'Recruiter'),
+    'Management': ('Project Manager', 'Team Lead'),
+    'Operations': ('Operations Associate', 'Content Writer'),
+    'CS': ('Support Agent',),
+}
+REASONS = ('Vacation', 'Medical', 'Family', 'Personal', 'Travel', 'Official Work')
+
+
+def create_schema(conn):
+    """Copy the table definitions from the shipped database, so the schema matches exactly."""
+    source = sqlite3.connect(SOURCE_DB)
+    try:
+        for name in TABLES:
+            sql = source.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()[0]
+            conn.execute(sql)
+    finally:
+        source.close()
+
+
+def employee_rows(rng, count):
+    departments = list(DEPARTMENTS)
+    for emp_id in range(1, count + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        department = rng.choice(departments)
+        yield (emp_id, f'{first} {last} {emp_id}', rng.choice(('Male', 'Female')), rng.randint(21, 60),
+               rng.choice(DEPARTMENTS[department]), department, f'+923{rng.randint(100000000, 999999999)}',
+               f'{first.lower()}{last.lower()}{emp_id}@company.com',
+               'Active' if rng.random() < 0.95 else 'Inactive')
+
+
+def leave_rows(rng, emp_id, first_day, today, per_year, entitlement):
+    """One employee's leaves, in date order and never overlapping."""
+    day = first_day + datetime.timedelta(days=rng.randint(0, 60))
+    year, balance = day.year, entitlement
+    horizon = today + datetime.timedelta(days=60)
+    while day < horizon:
+        # Exponential gaps average per_year leaves per year
+        day += datetime.timedelta(days=int(rng.expovariate(per_year / 365.0)) + 1)
+        if day.year != year:
+            year, balance = day.year, entitlement
+        days = min(rng.randint(1, 10), balance)
+        if days <= 0 or day >= horizon:
+            continue
+        start, end = day, day + datetime.timedelta(days=days - 1)
+        applied = start - datetime.timedelta(days=rng.randint(1, 14))
+        if applied > today:
+            day = end
+            continue
+        balance -= days
+
+        if start > today:
+            status = 'Approved' if rng.random() < 0.5 else 'Pending'
+        else:
+            status = rng.choices(('Approved', 'Rejected', 'Pending'), (0.85, 0.1, 0.05))[0]
+        if status == 'Approved' and end < today and rng.random() < 0.98:
+            returned, actual_return = 'Yes', end.isoformat()
+        elif status == 'Rejected':
+            returned, actual_return = 'Yes', None
+        else:
+            returned, actual_return = 'No', None
+        yield (emp_id, start.isoformat(), end.isoformat(), days, balance, rng.choice(REASONS), status, returned,
+               actual_return, applied.isoformat())
+        day = end
+
+
+def generate(path, employees, years, per_year, hashed_logins, seed):
+    import migrations
+    from balances import DEFAULT_BALANCE
+
+    if os.path.exists(path):
+        raise SystemExit(f'{path} already exists')
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    first_day = today.replace(year=today.year - years)
+
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode = MEMORY')
+    conn.execute('PRAGMA synchronous = OFF')
+    create_schema(conn)
+
+    started = time.perf_counter()
+    conn.executemany('INSERT INTO employees (id, name, gender, age, position, department, phone, email, status) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', employee_rows(rng, employees))
+
+    shared = generate_password_hash('pass')
+    hashed = min(hashed_logins, employees)
+    conn.executemany('INSERT INTO employee_users (employee_id, username, password) VALUES (?, ?, ?)',
+                     ((emp_id, f'user{emp_id}', generate_password_hash(f'pass{emp_id}') if emp_id <= hashed else shared)
+                      for emp_id in range(1, employees + 1)))
+
+    def all_leaves():
+        for emp_id in range(1, employees + 1):
+            yield from leave_rows(rng, emp_id, first_day, today, per_year, DEFAULT_BALANCE)
+
+    conn.executemany('INSERT INTO leaves (employee_id, start_date, end_date, leave_days, remaining_days, reason, '
+                     'status, returned, actual_return_date, applied_on) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                     all_leaves())
+    conn.commit()
+    loaded = time.perf_counter() - started
+
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    migrations.migrate(conn)
+    leaves = conn.execute('SELECT COUNT(*) FROM leaves').fetchone()[0]
+    conn.close()
+    print(f'{path}: {employees} employees, {leaves} leaves over {years} years '
+          f'(load {loaded:.1f}s, migrations {time.perf_counter() - started - loaded:.1f}s)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('path', help='database file to create')
+    parser.add_argument('--employees', type=int, default=10000)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--leaves-per-year', type=float, default=4.0, help='average leaves per employee per year')
+    parser.add_argument('--hashed-logins', type=int, default=50,
+                        help='employees (from id 1) whose pass<id> password is really hashed')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    generate(args.path, args.employees, args.years, args.leaves_per_year, args.hashed_logins, args.seed)
+
+
+if __name__ == '__main__':
+    main()
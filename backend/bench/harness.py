@@ -0,0 +1,82 @@
+"""Helpers shared by the HTTP benchmarks: start a server, talk to it, summarise latencies."""
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SERVERS = {
+    'sync': [sys.executable, '-c', 'import sys, server; server.app.run(port=int(sys.argv[1]), threaded=True)', '{port}'],
+    'async': [sys.executable, '-m', 'hypercorn', 'asgi:app', '--bind', '127.0.0.1:{port}'],
+    'gunicorn': [sys.executable, 'serve.py', '--bind', '127.0.0.1:{port}', '--workers', '{workers}'],
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarise(latencies_ms, elapsed, errors=0):
+    """requests, errors, req/s and latency percentiles (ms) for one run."""
+    result = {'requests': len(latencies_ms), 'errors': errors,
+              'rps': round(len(latencies_ms) / elapsed, 1) if elapsed else None}
+    if latencies_ms:
+        result.update({
+            'p50_ms': round(statistics.median(latencies_ms), 2),
+            'p90_ms': round(percentile(latencies_ms, 90), 2),
+            'p99_ms': round(percentile(latencies_ms, 99), 2),
+            'max_ms': round(max(latencies_ms), 2),
+        })
+    return result
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start(mode, db_path, workers=2):
+    """Start a server in mode on a free port against db_path; returns (process, port)."""
+    port = free_port()
+    command = [part.format(port=port, workers=workers) for part in SERVERS[mode]]
+    env = dict(os.environ, LMS_DB_PATH=db_path)
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return process, port
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def stop(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def request(conn, method, path, token=None, body=None, headers=None):
+    """One request on a keep-alive http.client connection; returns (status, body bytes)."""
+    headers = dict(headers or {})
+    if body is not None and not isinstance(body, (bytes, str)):
+        body = json.dumps(body)
+        headers.setdefault('Content-Type', 'application/json')
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    return response.status, response.read()
@@ -0,0 +1,95 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+# report_version counts writes to the tables the reports read. Triggers bump it
+# in the writing transaction, whoever writes (any worker process, the Admin/
+# scripts), so every process sees the same number for the same data.
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS report_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    """,
+    'INSERT OR IGNORE INTO report_version (id, version) VALUES (1, 0)',
+) + tuple(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_report_version_{table}_{action.lower()} AFTER {action} ON {table}
+    BEGIN
+        UPDATE report_version SET version = version + 1 WHERE id = 1;
+    END
+    """ for table in ('employees', 'leaves') for action in ('INSERT', 'UPDATE', 'DELETE'))
+
+
+def data_version(conn):
+    return conn.execute('SELECT version FROM report_version WHERE id = 1').fetchone()[0]
+
+
+class ReportCache:
+    """In-process cache for admin report results.
+
+    Every entry is stamped with the database's report_version, read when the
+    report is requested. Any committed write to employees or leaves makes
+    every cached report stale at once, in every worker, without tracking
+    which reports a write touches; the stamp doubles as the ETag, so workers
+    agree on it. Entries also expire after ttl seconds, since reports such as
+    overdue depend on the date as well.
+    """
+
+    def __init__(self, maxsize=256, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+
+    def stamp(self, conn):
+        # The last version seen is kept for stats()
+        self.version = data_version(conn)
+        return self.version, int(time.time() // self.ttl)
+
+    def etag(self, key, stamp):
+        version, epoch = stamp
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        return f'r{version}.{epoch}.{digest}'
+
+    def get_or_compute(self, key, compute, stamp):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1]
+            self._stats['misses'] += 1
+        value = compute()
+        with self._lock:
+            # Stored under the stamp read before computing: a write during compute leaves it stale
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def count_not_modified(self):
+        with self._lock:
+            self._stats['not_modified'] += 1
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data['version'] = self.version
+            data['size'] = len(self._entries)
+        lookups = data['hits'] + data['misses']
+        data['hit_rate'] = round(data['hits'] / lookups, 4) if lookups else 0.0
+        return data
+
+
+report_cache = ReportCache()
+
+
+def init_app(app):
+    report_cache.maxsize = app.config.get('REPORT_CACHE_SIZE', 256)
+    report_cache.ttl = app.config.get('REPORT_CACHE_TTL', 60.0)
+
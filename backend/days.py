@@ -0,0 +1,80 @@
+import datetime
+
+# leaves.start_date, end_date and applied_on are TEXT. start_day, end_day and
+# applied_day hold the same dates as integer day numbers (days since
+# 1970-01-01), so range filters compare integers against an index instead of
+# relying on every writer using one string format. The write paths fill them
+# from validated dates; the triggers below cover rows written with plain SQL.
+
+EPOCH = datetime.date(1970, 1, 1)
+
+# SQL expression for the day number of an ISO date string (NULL if it does not parse)
+SQL_DAY = "CAST(julianday({}) - 2440587.5 AS INTEGER)"
+
+SCHEMA = (
+    'ALTER TABLE leaves ADD COLUMN start_day INTEGER',
+    'ALTER TABLE leaves ADD COLUMN end_day INTEGER',
+    'ALTER TABLE leaves ADD COLUMN applied_day INTEGER',
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_days_leave_insert AFTER INSERT ON leaves
+    WHEN NEW.start_day IS NULL OR NEW.end_day IS NULL OR NEW.applied_day IS NULL
+    BEGIN
+        UPDATE leaves SET
+            start_day = COALESCE(NEW.start_day, {SQL_DAY.format('NEW.start_date')}),
+            end_day = COALESCE(NEW.end_day, {SQL_DAY.format('NEW.end_date')}),
+            applied_day = COALESCE(NEW.applied_day, {SQL_DAY.format('NEW.applied_on')})
+        WHERE leave_id = NEW.leave_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_days_leave_update AFTER UPDATE OF start_date, end_date, applied_on ON leaves
+    BEGIN
+        UPDATE leaves SET
+            start_day = {SQL_DAY.format('NEW.start_date')},
+            end_day = {SQL_DAY.format('NEW.end_date')},
+            applied_day = {SQL_DAY.format('NEW.applied_on')}
+        WHERE leave_id = NEW.leave_id;
+    END
+    """,
+)
+
+INDEXES = (
+    # Overlap checks: employee_id = ? AND start_day <= ? AND end_day >= ?
+    'CREATE INDEX IF NOT EXISTS idx_leaves_employee_days ON leaves (employee_id, start_day, end_day)',
+    # Overdue and on-leave reports: status = ? AND returned = ? AND end_day < ?
+    'DROP INDEX IF EXISTS idx_leaves_status_returned_end',
+    'CREATE INDEX IF NOT EXISTS idx_leaves_status_returned_end_day ON leaves (status, returned, end_day)',
+    # Calendar: status = 'Approved' AND end_day >= ? AND start_day <= ?
+    'CREATE INDEX IF NOT EXISTS idx_leaves_status_days ON leaves (status, end_day, start_day)',
+)
+
+
+def to_day(value):
+    """Day number of a date or YYYY-MM-DD string; ValueError if it is not a valid date."""
+    if isinstance(value, str):
+        value = datetime.date.fromisoformat(value)
+    return (value - EPOCH).days
+
+
+def from_day(day):
+    return (EPOCH + datetime.timedelta(days=day)).isoformat()
+
+
+def today():
+    return to_day(datetime.date.today())
+
+
+def backfill(conn):
+    """Fill the day columns of existing leaves in one statement. Caller commits.
+
+    Runs inside migration 5's transaction, so the table stays write-locked
+    until the whole migration commits. Returns the number of rows whose dates
+    did not parse; their day columns stay NULL and the reports skip them.
+    """
+    conn.execute(f"""
+        UPDATE leaves SET
+            start_day = {SQL_DAY.format('start_date')},
+            end_day = {SQL_DAY.format('end_date')},
+            applied_day = {SQL_DAY.format('applied_on')}
+    """)
+    return conn.execute('SELECT COUNT(*) FROM leaves WHERE start_day IS NULL OR end_day IS NULL').fetchone()[0]
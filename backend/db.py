@@ -0,0 +1,280 @@
+import atexit
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g
+
+# Get the directory where the script is located
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# The DB is located in the root (one level up from backend/); LMS_DB_PATH overrides it
+DB_PATH = os.environ.get('LMS_DB_PATH', os.path.join(BASE_DIR, '..', 'leave_management_system.db'))
+
+# Applied to every new connection. journal_mode is persistent and is set once in setup().
+PRAGMAS = (
+    ('busy_timeout', 5000),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -16000),     # ~16 MB page cache per connection
+    ('temp_store', 'MEMORY'),
+    ('mmap_size', 134217728),   # 128 MB
+)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the pool timeout."""
+
+
+def pool_size(threads):
+    """Connections for an app serving requests on threads threads: one each, plus one for the SSE relay."""
+    return threads + 1
+
+
+class ConnectionPool:
+    """A fixed-size pool of SQLite connections.
+
+    A thread that already holds a connection gets the same one back on a
+    nested acquire(), so helpers can call get_db()/acquire() freely without
+    opening a second connection. Idle connections are health-checked with
+    SELECT 1 before reuse if they have been idle longer than
+    health_check_interval seconds.
+    """
+
+    def __init__(self, path=DB_PATH, size=5, timeout=10.0, health_check_interval=30.0, factory=sqlite3.Connection):
+        self.path = path
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ready = False
+        self._stats = {'hits': 0, 'misses': 0, 'waits': 0, 'wait_time': 0.0, 'timeouts': 0, 'discarded': 0,
+                       'busy_retries': 0}
+
+    def configure(self, path=None, size=None, timeout=None, health_check_interval=None, factory=None):
+        """Change settings; existing connections are dropped so they pick up the new path."""
+        self.close_all()
+        if path is not None:
+            self.path = path
+        if factory is not None:
+            self.factory = factory
+        if size is not None:
+            self.size = size
+        if timeout is not None:
+            self.timeout = timeout
+        if health_check_interval is not None:
+            self.health_check_interval = health_check_interval
+        self._ready = False
+
+    def setup(self):
+        """One-time database setup: switch the file to WAL mode."""
+        with self._lock:
+            if self._ready:
+                return
+            conn = sqlite3.connect(self.path)
+            try:
+                conn.execute('PRAGMA journal_mode = WAL')
+            finally:
+                conn.close()
+            self._ready = True
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        for name, value in PRAGMAS:
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _new_connection(self):
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+            self._stats['misses'] += 1
+        try:
+            return self._connect()
+        except sqlite3.Error:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+            self._stats['discarded'] += 1
+
+    def _healthy(self, conn, last_used):
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _checkout(self):
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+                with self._lock:
+                    self._stats['hits'] += 1
+            except queue.Empty:
+                conn = self._new_connection()
+                if conn is not None:
+                    return conn
+                started = time.monotonic()
+                try:
+                    conn, last_used = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._stats['timeouts'] += 1
+                    raise PoolTimeout(f'No database connection available after {self.timeout}s')
+                with self._lock:
+                    self._stats['waits'] += 1
+                    self._stats['wait_time'] += time.monotonic() - started
+            if self._healthy(conn, last_used):
+                return conn
+            self._discard(conn)
+
+    def acquire(self):
+        if not self._ready:
+            self.setup()
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            self._local.depth += 1
+            with self._lock:
+                self._stats['hits'] += 1
+            return held
+        conn = self._checkout()
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn):
+        if getattr(self._local, 'conn', None) is conn:
+            self._local.depth -= 1
+            if self._local.depth > 0:
+                return
+            self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put((conn, time.monotonic()))
+
+    def close_all(self):
+        """Close every idle connection (connections in use are closed on release by GC)."""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+        self._local = threading.local()
+
+    def after_fork(self):
+        """Forget connections inherited from the parent process; call in the child.
+
+        A SQLite connection must not be used on both sides of a fork, so they are
+        dropped without being closed and the child opens its own on first use.
+        """
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = dict.fromkeys(self._stats, 0)
+
+    def count_busy_retry(self):
+        with self._lock:
+            self._stats['busy_retries'] += 1
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data['size'] = self.size
+            data['open'] = self._created
+        data['idle'] = self._idle.qsize()
+        data['in_use'] = data['open'] - data['idle']
+        lookups = data['hits'] + data['misses']
+        data['hit_rate'] = round(data['hits'] / lookups, 4) if lookups else 0.0
+        return data
+
+
+pool = ConnectionPool()
+atexit.register(pool.close_all)
+
+
+def is_busy(error):
+    message = str(error)
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+
+def run_in_transaction(conn, fn, retries=5, backoff=0.05):
+    """Run fn(conn) inside BEGIN IMMEDIATE and commit.
+
+    BEGIN IMMEDIATE takes the write lock up front, so a read-check-write in fn
+    cannot interleave with another writer. If the lock is still busy after
+    busy_timeout, the whole transaction is retried up to retries times with
+    jittered exponential backoff. Any exception from fn rolls back.
+    """
+    for attempt in range(retries + 1):
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            result = fn(conn)
+            conn.commit()
+            return result
+        except sqlite3.OperationalError as e:
+            if conn.in_transaction:
+                conn.rollback()
+            if not is_busy(e) or attempt == retries:
+                raise
+            pool.count_busy_retry()
+            time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+
+@contextmanager
+def connection():
+    """Borrow a pooled connection outside of a Flask request (CLI scripts)."""
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+# --- Flask integration ---
+
+def get_db():
+    """Return the connection bound to the current app context."""
+    if 'db' not in g:
+        g.db = pool.acquire()
+    return g.db
+
+
+def close_db(exc=None):
+    conn = g.pop('db', None)
+    if conn is not None:
+        pool.release(conn)
+
+
+def init_app(app):
+    pool.configure(
+        path=app.config.get('DB_PATH', DB_PATH),
+        size=app.config.get('DB_POOL_SIZE', 5),
+        timeout=app.config.get('DB_POOL_TIMEOUT', 10.0),
+        health_check_interval=app.config.get('DB_HEALTH_CHECK_INTERVAL', 30.0),
+    )
+    pool.setup()
+    app.teardown_appcontext(close_db)
@@ -0,0 +1,191 @@
+import csv
+import io
+import json
+import sqlite3
+import threading
+
+import accrual
+from db import run_in_transaction
+from passwords import hasher
+
+# Imports in one process take turns so they do not invalidate each other's predicted ids
+_import_lock = threading.Lock()
+
+FIELDS = ('name', 'gender', 'age', 'position', 'department', 'phone', 'email', 'status')
+
+
+class ImportFileError(ValueError):
+    """The import file itself could not be read."""
+
+
+class ImportAborted(Exception):
+    """Nothing was inserted.
+
+    errors maps positions in the batch to why the database refused them;
+    import_employees adds results, the per-row report, before re-raising.
+    """
+    reason = 'Not imported'
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or {}
+        self.results = None
+
+
+class IdConflict(ImportAborted):
+    """Other writers kept adding employees, so the predicted ids never held."""
+    reason = 'Not imported: employee ids kept changing'
+
+
+class RowsRejected(ImportAborted):
+    """The database refused some rows (e.g. a username that is already taken)."""
+    reason = 'Not imported: other rows were rejected'
+
+
+def parse_file(data, fmt):
+    """Parse CSV text or JSON (a list, or {"employees": [...]}) into a list of dicts."""
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(data)))
+    try:
+        rows = json.loads(data)
+    except ValueError as e:
+        raise ImportFileError(f'Invalid JSON: {e}')
+    if isinstance(rows, dict):
+        rows = rows.get('employees')
+    if not isinstance(rows, list):
+        raise ImportFileError('Expected a list of employees')
+    return rows
+
+
+def validate(row):
+    """Return (values, None) for a good row or (None, error message)."""
+    if not isinstance(row, dict):
+        return None, 'Row is not an object'
+    missing = [field for field in FIELDS if row.get(field) in (None, '')]
+    if missing:
+        return None, f"Missing fields: {', '.join(missing)}"
+    try:
+        age = int(row['age'])
+    except (TypeError, ValueError):
+        return None, 'age must be an integer'
+    return (str(row['name']).strip(), row['gender'], age, row['position'], row['department'],
+            str(row['phone']), row['email'], row['status']), None
+
+
+def hash_passwords(plain):
+    """Hash on the shared password pool; a single password takes a slot like login does (HasherBusy)."""
+    if len(plain) == 1:
+        return [hasher.hash(plain[0])]
+    return hasher.map_hash(plain)
+
+
+def next_employee_id(conn):
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'employees'").fetchone()
+    last = row[0] if row else 0
+    return max(last, conn.execute('SELECT COALESCE(MAX(id), 0) FROM employees').fetchone()[0]) + 1
+
+
+INSERT_EMPLOYEE = """
+    INSERT INTO employees (id, name, gender, age, position, department, phone, email, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_USER = 'INSERT INTO employee_users (employee_id, username, password) VALUES (?, ?, ?)'
+
+
+def find_rejected(conn, employees, users):
+    """Insert the rows one at a time under a savepoint; returns {position: error} for those refused.
+
+    Used only to explain a failed batch; the caller rolls the transaction back.
+    """
+    errors = {}
+    for position, (employee, user) in enumerate(zip(employees, users)):
+        conn.execute('SAVEPOINT import_row')
+        try:
+            conn.execute(INSERT_EMPLOYEE, employee)
+            conn.execute(INSERT_USER, user)
+        except sqlite3.IntegrityError as e:
+            errors[position] = str(e)
+            conn.execute('ROLLBACK TO import_row')
+        conn.execute('RELEASE import_row')
+    return errors
+
+
+def create_employees(conn, values, attempts=3):
+    """Insert employees (tuples in FIELDS order) and their logins in one transaction; returns their ids.
+
+    Logins are user<id> / pass<id>. Ids are predicted from the AUTOINCREMENT
+    sequence so passwords can be hashed on the shared password pool before the
+    write lock is taken; if another writer added employees meanwhile the hashes
+    are recomputed, and IdConflict is raised once attempts run out. Callers in
+    the same process take turns. If the database refuses any row nothing is
+    inserted, and RowsRejected says which. New employees get their first
+    balance (accrual.seed) in the same transaction.
+    """
+    with _import_lock:
+        for _ in range(attempts):
+            first_id = next_employee_id(conn)
+            ids = list(range(first_id, first_id + len(values)))
+            hashes = hash_passwords([f'pass{emp_id}' for emp_id in ids])
+            employees = [(emp_id,) + row for emp_id, row in zip(ids, values)]
+            users = [(emp_id, f'user{emp_id}', pwhash) for emp_id, pwhash in zip(ids, hashes)]
+
+            def insert(conn):
+                if next_employee_id(conn) != first_id:
+                    return False
+                conn.execute('SAVEPOINT import_batch')
+                try:
+                    conn.executemany(INSERT_EMPLOYEE, employees)
+                    conn.executemany(INSERT_USER, users)
+                except sqlite3.IntegrityError:
+                    conn.execute('ROLLBACK TO import_batch')
+                    errors = find_rejected(conn, employees, users)
+                    if not errors:
+                        raise
+                    raise RowsRejected('The database rejected some rows; nothing was imported', errors)
+                conn.execute('RELEASE import_batch')
+                accrual.seed(conn, ids)
+                return True
+
+            if run_in_transaction(conn, insert):
+                return ids
+    raise IdConflict('Employee ids kept changing during import; try again')
+
+
+def _aborted(results, valid, errors, reason):
+    """The report for an import that wrote nothing: row errors, and the valid rows marked not imported."""
+    results = list(results)
+    for position, (index, _) in enumerate(valid):
+        results[index] = {'row': index + 1, 'status': 'error', 'error': errors.get(position, reason)}
+    return results
+
+
+def import_employees(conn, rows, attempts=3):
+    """Insert every valid row into employees and employee_users in one transaction.
+
+    Logins follow add_employee (see create_employees). Rows that fail
+    validation are reported and skipped. If the insert itself is aborted, the
+    ImportAborted raised carries the per-row report in results. Returns one
+    result dict per input row.
+    """
+    results = [None] * len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        values, error = validate(row)
+        if error:
+            results[index] = {'row': index + 1, 'status': 'error', 'error': error}
+        else:
+            valid.append((index, values))
+
+    if not valid:
+        return results
+
+    try:
+        ids = create_employees(conn, [values for _, values in valid], attempts)
+    except ImportAborted as e:
+        e.results = _aborted(results, valid, e.errors, e.reason)
+        raise
+
+    for emp_id, (index, _) in zip(ids, valid):
+        results[index] = {'row': index + 1, 'status': 'created', 'id': emp_id,
+                          'username': f'user{emp_id}', 'password': f'pass{emp_id}'}
+    return results
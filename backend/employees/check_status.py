@@ -1,8 +1,13 @@
-import sqlite3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from balances import get_balance
+from db import pool
 
 def check_status():
-    conn = sqlite3.connect("leave_management_system.db")
-    conn.row_factory = sqlite3.Row
+    # Borrow a connection from the shared pool
+    conn = pool.acquire()
     cursor = conn.cursor()
 
     try:
@@ -21,18 +26,18 @@ def check_status():
 
         if not latest_leave:
             print("No leave records found.")
-            print("Current Balance: 20 days")
+            print(f"Current Balance: {get_balance(conn, emp_id)} days")
         else:
             print(f"\nLatest Leave Status for Employee {emp_id}:")
             print(f"Status: {latest_leave['status']}")
-            print(f"Remaining Days: {latest_leave['remaining_days']}")
+            print(f"Remaining Days: {get_balance(conn, emp_id)}")
             print(f"Expected Return Date: {latest_leave['end_date']}") 
             # Note: Ideally return date is end_date + 1, but keeping simple as per request logic
 
     except Exception as e:
         print(f"An error occurred: {e}")
     finally:
-        conn.close()
+        pool.release(conn)
 
 if __name__ == "__main__":
     check_status()
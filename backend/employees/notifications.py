@@ -1,10 +1,13 @@
-import sqlite3
-from datetime import datetime, timedelta
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from days import from_day
+from db import pool
 
 def notifications():
-    # Connect to SQLite DB
-    conn = sqlite3.connect("leave_management_system.db")
-    conn.row_factory = sqlite3.Row
+    # Borrow a connection from the shared pool
+    conn = pool.acquire()
     cursor = conn.cursor()
 
     try:
@@ -29,15 +32,8 @@ def notifications():
         print(f"Leave Status: {status}")
 
         if status == 'Approved':
-            end_date_str = latest_leave['end_date']
-            try:
-                # Assuming date format is YYYY-MM-DD
-                end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
-                return_date = end_date + timedelta(days=1)
-                print(f"Return Reminder: Please return to work on {return_date.strftime('%Y-%m-%d')}")
-            except ValueError:
-                # Fallback if date format is different
-                print(f"Return Reminder: Please return after {end_date_str}")
+            # end_day is the validated day number of end_date
+            print(f"Return Reminder: Please return to work on {from_day(latest_leave['end_day'] + 1)}")
 
         elif status == 'Rejected':
              print("Alert: Your leave application was rejected. Please contact HR.")
@@ -48,7 +44,7 @@ def notifications():
     except Exception as e:
         print(f"An error occurred: {e}")
     finally:
-        conn.close()
+        pool.release(conn)
 
 if __name__ == "__main__":
     notifications()
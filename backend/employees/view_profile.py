@@ -1,10 +1,13 @@
-import sqlite3
+import os
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from balances import get_balance
+from db import pool
+
 def view_profile():
-    # Connect to SQLite DB
-    conn = sqlite3.connect("leave_management_system.db")
-    conn.row_factory = sqlite3.Row
+    # Borrow a connection from the shared pool
+    conn = pool.acquire()
     cursor = conn.cursor()
 
     try:
@@ -20,14 +23,10 @@ def view_profile():
 
         username = user_row['username']
         
-        # Get Leave History and Calculate Balance
+        # Get Leave History and Balance
         cursor.execute("SELECT * FROM leaves WHERE employee_id = ? ORDER BY leave_id DESC", (emp_id,))
         leaves = cursor.fetchall()
-        
-        # Determine remaining days from latest leave
-        remaining_days = 20 # Default
-        if leaves:
-            remaining_days = leaves[0]['remaining_days']
+        remaining_days = get_balance(conn, emp_id)
 
         print("\n" + "="*40)
         print(f" EMPLOYEE PROFILE: {username} (ID: {emp_id})")
@@ -49,7 +48,7 @@ def view_profile():
     except Exception as e:
         print(f"An error occurred: {e}")
     finally:
-        conn.close()
+        pool.release(conn)
 
 if __name__ == "__main__":
     view_profile()
@@ -0,0 +1,263 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from db import connection, run_in_transaction
+
+log = logging.getLogger('lms.events')
+
+# Every published event is also written to event_log, so streams held by other
+# worker processes get it too (EventRelay). Rows are only kept for a minute.
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS event_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source INTEGER NOT NULL,
+        topics TEXT NOT NULL,
+        event TEXT NOT NULL,
+        data TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """,
+)
+
+
+class TooManyStreams(Exception):
+    """Raised when the concurrent stream cap is reached."""
+
+
+class Subscription:
+    def __init__(self, topics, maxsize, wakeup=None):
+        self.topics = frozenset(topics)
+        self.queue = queue.Queue(maxsize)
+        # Called from the publishing thread after each put (used by async streams)
+        self.wakeup = wakeup
+        # Set when an event was dropped because the client is not keeping up
+        self.overflowed = False
+
+
+class EventBus:
+    """In-process pub/sub for server-sent events.
+
+    Each subscriber has a bounded queue. publish() never blocks: if a slow
+    client's queue is full the event is dropped and the subscriber is flagged,
+    and the stream then tells the client to resync (refetch) instead of
+    buffering without limit. At most max_streams subscriptions may be open.
+    """
+
+    def __init__(self, max_streams=100, queue_size=100):
+        self.max_streams = max_streams
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._stats = {'published': 0, 'delivered': 0, 'dropped': 0, 'rejected_streams': 0}
+
+    def subscribe(self, topics, wakeup=None):
+        with self._lock:
+            if len(self._subscribers) >= self.max_streams:
+                self._stats['rejected_streams'] += 1
+                raise TooManyStreams(f'Too many open event streams (max {self.max_streams})')
+            sub = Subscription(topics, self.queue_size, wakeup)
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, topics, event, data):
+        """Send event to every subscriber of any of topics."""
+        topics = set(topics)
+        message = (next(self._ids), event, data)
+        with self._lock:
+            targets = [sub for sub in self._subscribers if sub.topics & topics]
+            self._stats['published'] += 1
+        delivered = dropped = 0
+        for sub in targets:
+            try:
+                sub.queue.put_nowait(message)
+                delivered += 1
+            except queue.Full:
+                sub.overflowed = True
+                dropped += 1
+            if sub.wakeup is not None:
+                sub.wakeup()
+        with self._lock:
+            self._stats['delivered'] += delivered
+            self._stats['dropped'] += dropped
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data['streams'] = len(self._subscribers)
+            data['max_streams'] = self.max_streams
+        return data
+
+
+class EventRelay:
+    """Carries events between processes sharing the database.
+
+    record() writes events to event_log in one transaction. The first stream
+    opened in a process starts a thread that polls event_log every interval
+    seconds and republishes, on this process's bus, the events other
+    processes (source is the pid) recorded since it started. Rows older than
+    keep seconds are deleted as new ones are written.
+    """
+
+    def __init__(self, bus, interval=0.5, keep=60.0):
+        self.bus = bus
+        self.interval = interval
+        self.keep = keep
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def record(self, messages):
+        """Write [(topics, event, data)] to event_log."""
+        now = time.time()
+        rows = [(os.getpid(), json.dumps(sorted(topics)), event, json.dumps(data, default=str), now)
+                for topics, event, data in messages]
+
+        def write(conn):
+            conn.executemany('INSERT INTO event_log (source, topics, event, data, created_at) VALUES (?, ?, ?, ?, ?)',
+                             rows)
+            conn.execute('DELETE FROM event_log WHERE created_at < ?', (now - self.keep,))
+
+        with connection() as conn:
+            run_in_transaction(conn, write)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                with connection() as conn:
+                    last = conn.execute('SELECT COALESCE(MAX(id), 0) FROM event_log').fetchone()[0]
+                self._thread = threading.Thread(target=self._run, args=(last,), name='event-relay', daemon=True)
+                self._thread.start()
+
+    def _run(self, last):
+        while True:
+            time.sleep(self.interval)
+            try:
+                with connection() as conn:
+                    rows = conn.execute('SELECT id, source, topics, event, data FROM event_log WHERE id > ? ORDER BY id',
+                                        (last,)).fetchall()
+            except Exception:
+                log.exception('Reading event_log failed')
+                continue
+            pid = os.getpid()
+            for event_id, source, topics, event, data in rows:
+                last = event_id
+                if source != pid:
+                    self.bus.publish(json.loads(topics), event, json.loads(data))
+
+    def after_fork(self):
+        """The parent's relay thread does not exist in a forked child; the next stream starts a new one."""
+        self._thread = None
+        self._lock = threading.Lock()
+
+
+bus = EventBus()
+relay = EventRelay(bus)
+
+
+def init_app(app):
+    bus.max_streams = app.config.get('SSE_MAX_STREAMS', 100)
+    bus.queue_size = app.config.get('SSE_QUEUE_SIZE', 100)
+    relay.interval = app.config.get('SSE_RELAY_INTERVAL', 0.5)
+
+
+def employee_topic(emp_id):
+    return f'employee:{emp_id}'
+
+
+ADMIN_TOPIC = 'admin'
+
+
+def publish_leaves(event, items):
+    """Notify each leave's owner and every admin stream, here and (through event_log) in other processes.
+
+    items are (employee_id, data) pairs.
+    """
+    messages = [((employee_topic(emp_id), ADMIN_TOPIC), event, dict(data, employee_id=emp_id)) for emp_id, data in items]
+    if not messages:
+        return
+    for message in messages:
+        bus.publish(*message)
+    try:
+        relay.record(messages)
+    except Exception:
+        # The write behind the events is already committed; other workers' streams miss them
+        log.exception('Recording events in event_log failed')
+
+
+def publish_leave(event, emp_id, data):
+    publish_leaves(event, [(emp_id, data)])
+
+
+def subscribe(topics):
+    relay.start()
+    return bus.subscribe(topics)
+
+
+def format_event(event_id, event, data):
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _chunk(sub, message):
+    if sub.overflowed:
+        # Events were dropped; discard the backlog and ask the client to refetch
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.overflowed = False
+        return format_event(message[0], 'resync', {})
+    return format_event(*message)
+
+
+def stream(sub, heartbeat=15.0):
+    """SSE body for a subscription; unsubscribes when the client goes away."""
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                message = sub.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            yield _chunk(sub, message)
+    finally:
+        bus.unsubscribe(sub)
+
+
+def async_subscribe(topics):
+    """Subscribe from a coroutine; publishers wake the event loop instead of a blocked thread."""
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+    relay.start()
+    sub = bus.subscribe(topics, wakeup=lambda: loop.call_soon_threadsafe(ready.set))
+    sub.ready = ready
+    return sub
+
+
+async def astream(sub, heartbeat=15.0):
+    """Async SSE body for a subscription from async_subscribe()."""
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                message = sub.queue.get_nowait()
+            except queue.Empty:
+                sub.ready.clear()
+                if sub.queue.empty():
+                    try:
+                        await asyncio.wait_for(sub.ready.wait(), heartbeat)
+                    except asyncio.TimeoutError:
+                        yield ': keep-alive\n\n'
+                continue
+            yield _chunk(sub, message)
+    finally:
+        bus.unsubscribe(sub)
@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+
+# Rows pulled from the cursor per fetchmany(); memory stays bounded by this
+BATCH_SIZE = 1000
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+    'csv': 'text/csv',
+}
+
+
+def iter_batches(cursor, batch_size=BATCH_SIZE):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+def encoder(fmt, description):
+    """(head, encode_batch, tail) for a format; encode_batch turns a list of rows into one chunk."""
+    if fmt == 'csv':
+        # Header row first, so the client gets bytes immediately
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([column[0] for column in description])
+        head = buffer.getvalue()
+
+        def encode(rows):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            return buffer.getvalue()
+        return head, encode, ''
+
+    if fmt == 'json':
+        # A single JSON array, written incrementally
+        separator = ''
+
+        def encode(rows):
+            nonlocal separator
+            chunk = separator + ','.join(json.dumps(dict(row), default=str) for row in rows)
+            separator = ','
+            return chunk
+        return '[', encode, ']'
+
+    # ndjson: one JSON object per line
+    def encode(rows):
+        return ''.join(json.dumps(dict(row), default=str) + '\n' for row in rows)
+    return '', encode, ''
+
+
+def stream(cursor, fmt, batch_size=BATCH_SIZE):
+    head, encode, tail = encoder(fmt, cursor.description)
+    if head:
+        yield head
+    for rows in iter_batches(cursor, batch_size):
+        yield encode(rows)
+    if tail:
+        yield tail
+
+
+async def astream(cursor, fmt, batch_size=BATCH_SIZE):
+    """stream() for an aiosqlite cursor."""
+    head, encode, tail = encoder(fmt, cursor.description)
+    if head:
+        yield head
+    while True:
+        rows = await cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield encode(rows)
+    if tail:
+        yield tail
@@ -0,0 +1,139 @@
+import datetime
+
+from days import to_day
+from pagination import QueryError, parse_date
+
+# Request-argument parsing shared by the WSGI (server.py) and ASGI (asgi.py) apps.
+
+# The columns the API returns. Internal columns (employees.version and joined_on,
+# the leave day numbers) are never selected into a response.
+EMPLOYEE_FIELDS = ('id', 'name', 'gender', 'age', 'position', 'department', 'phone', 'email', 'status')
+LEAVE_FIELDS = ('leave_id', 'employee_id', 'start_date', 'end_date', 'leave_days', 'remaining_days',
+                'reason', 'status', 'returned', 'actual_return_date', 'applied_on')
+
+EMPLOYEE_COLUMNS = {name: name for name in EMPLOYEE_FIELDS}
+LEAVE_COLUMNS = {name: f'l.{name}' for name in LEAVE_FIELDS}
+LEAVE_COLUMNS['employee_name'] = 'e.name AS employee_name'
+
+LEAVE_SOURCE = 'leaves l JOIN employees e ON l.employee_id = e.id'
+
+# Most ids one /api/admin/employees/details request may ask for (one IN list)
+MAX_DETAIL_IDS = 500
+
+# Longest range /api/admin/calendar returns, in days
+MAX_CALENDAR_DAYS = 3660
+CALENDAR_DEFAULT_DAYS = 30
+
+# Updatable through PATCH /api/admin/employees/<id>
+EMPLOYEE_UPDATE_FIELDS = ('name', 'position', 'department', 'email', 'status')
+
+
+def select_list(fields, alias=None):
+    """'a, b' or, with alias, 'e.a, e.b' for a SELECT."""
+    return ', '.join(f'{alias}.{name}' if alias else name for name in fields)
+
+
+EMPLOYEE_SELECT = select_list(EMPLOYEE_FIELDS)
+LEAVE_SELECT = select_list(LEAVE_FIELDS)
+# Leaves with their employee's name, over LEAVE_SOURCE
+LEAVE_LIST_SELECT = ', '.join(LEAVE_COLUMNS.values())
+
+
+def employee_filters(args):
+    """WHERE clauses for the admin employee list."""
+    where, params = [], []
+    for name in ('status', 'department'):
+        if args.get(name):
+            where.append(f'{name} = ?')
+            params.append(args[name])
+    return where, params
+
+
+def _filter_value(args, name):
+    """args[name], type-checked: the bulk status endpoint passes a JSON object, not query args."""
+    value = args.get(name)
+    if name == 'employee_id':
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.isdigit():
+            return int(value)
+        raise QueryError('employee_id must be an integer')
+    if not isinstance(value, str):
+        raise QueryError(f'{name} must be a string')
+    return value
+
+
+def leave_filters(args):
+    """WHERE clauses for the admin leave queries (leaves l JOIN employees e)."""
+    where, params = [], []
+    for name in ('status', 'returned', 'employee_id'):
+        if args.get(name):
+            where.append(f'l.{name} = ?')
+            params.append(_filter_value(args, name))
+    if args.get('department'):
+        where.append('e.department = ?')
+        params.append(_filter_value(args, 'department'))
+    # Date range: leaves overlapping [from, to], compared as day numbers
+    date_from, date_to = parse_date(args, 'from'), parse_date(args, 'to')
+    if date_from:
+        where.append('l.end_day >= ?')
+        params.append(to_day(date_from))
+    if date_to:
+        where.append('l.start_day <= ?')
+        params.append(to_day(date_to))
+    applied_after, applied_before = parse_date(args, 'applied_after'), parse_date(args, 'applied_before')
+    if applied_after:
+        where.append('l.applied_day >= ?')
+        params.append(to_day(applied_after))
+    if applied_before:
+        where.append('l.applied_day < ?')
+        params.append(to_day(applied_before))
+    return where, params
+
+
+def export_query(args):
+    """Full leave history with employee names for the export endpoint."""
+    where, params = leave_filters(args)
+    sql = f"SELECT {LEAVE_LIST_SELECT} FROM {LEAVE_SOURCE}"
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    return sql + ' ORDER BY l.leave_id', params
+
+
+def calendar_args(args):
+    """(from, to, department, day) for /api/admin/calendar; the range defaults to the next 30 days."""
+    date_from = parse_date(args, 'from') or datetime.date.today().isoformat()
+    date_to = parse_date(args, 'to') or (datetime.date.fromisoformat(date_from)
+                                         + datetime.timedelta(days=CALENDAR_DEFAULT_DAYS - 1)).isoformat()
+    if date_to < date_from:
+        raise QueryError('to must not be before from')
+    if (datetime.date.fromisoformat(date_to) - datetime.date.fromisoformat(date_from)).days >= MAX_CALENDAR_DAYS:
+        raise QueryError(f'The range may cover at most {MAX_CALENDAR_DAYS} days')
+    return date_from, date_to, args.get('department') or None, parse_date(args, 'day')
+
+
+def detail_args(args):
+    """(ids, history_limit) for /api/admin/employees/details?ids=1,2,3&history_limit=N."""
+    ids = []
+    for value in args.getlist('ids'):
+        for part in value.split(','):
+            if part.strip():
+                try:
+                    ids.append(int(part))
+                except ValueError:
+                    raise QueryError('ids must be a comma-separated list of integers')
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise QueryError('ids is required')
+    if len(ids) > MAX_DETAIL_IDS:
+        raise QueryError(f'At most {MAX_DETAIL_IDS} ids per request')
+
+    history_limit = args.get('history_limit')
+    if history_limit is not None:
+        try:
+            history_limit = int(history_limit)
+        except ValueError:
+            raise QueryError('history_limit must be an integer')
+        if history_limit < 0:
+            raise QueryError('history_limit must not be negative')
+    return ids, history_limit
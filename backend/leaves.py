@@ -0,0 +1,189 @@
+import datetime
+import heapq
+
+from balances import get_balance
+from days import from_day, to_day
+from db import run_in_transaction
+from filters import LEAVE_SELECT
+from workdays import calendar
+
+
+class LeaveError(Exception):
+    """A leave request that cannot be accepted; message is shown to the user."""
+
+
+class InsufficientBalance(LeaveError):
+    def __init__(self, balance, requested):
+        super().__init__(f'Insufficient balance. You have {balance} days, requested {requested}.')
+        self.balance = balance
+        self.requested = requested
+
+
+class OverlappingLeave(LeaveError):
+    def __init__(self, leave):
+        super().__init__(f"Overlaps your {leave['status'].lower()} leave from {leave['start_date']} to {leave['end_date']}.")
+        self.leave = leave
+
+
+# Leaves that still hold the employee's days; a rejected leave may be re-applied for
+ACTIVE_STATUSES = ('Pending', 'Approved')
+
+
+def _parse_day(value, name):
+    try:
+        return to_day(value)
+    except (TypeError, ValueError):
+        raise LeaveError(f'{name} must be a date in YYYY-MM-DD format')
+
+
+def find_overlap(conn, emp_id, start_day, end_day):
+    """The employee's first pending/approved leave intersecting [start_day, end_day], or None.
+
+    A range query on idx_leaves_employee_days (employee_id, start_day,
+    end_day): only the employee's leaves starting on or before end_day are
+    visited, and end_day is checked from the index.
+    """
+    return conn.execute(f"""
+        SELECT leave_id, start_date, end_date, status FROM leaves
+        WHERE employee_id = ? AND start_day <= ? AND end_day >= ?
+          AND status IN ({', '.join('?' * len(ACTIVE_STATUSES))})
+        ORDER BY start_day
+        LIMIT 1
+    """, (emp_id, end_day, start_day) + ACTIVE_STATUSES).fetchone()
+
+
+def submit_leave(conn, emp_id, start_date, end_date, reason):
+    """Check overlaps and the balance, then insert a Pending leave atomically.
+    Returns the stored leave as a dict, with the dates in canonical form and
+    remaining_days the new balance.
+
+    leave_days is the number of working days in the range (workdays.calendar):
+    weekends and public holidays are not charged against the balance.
+
+    Runs under BEGIN IMMEDIATE, so two concurrent applications for the same
+    employee are serialized and can neither spend the same balance nor book
+    the same days twice.
+    """
+    start_day, end_day = _parse_day(start_date, 'start_date'), _parse_day(end_date, 'end_date')
+    if end_day < start_day:
+        raise LeaveError('end_date must not be before start_date')
+    try:
+        leave_days = calendar.count(start_day, end_day)
+    except ValueError as e:
+        raise LeaveError(str(e))
+    if leave_days == 0:
+        raise LeaveError('The selected dates contain no working days')
+    # Stored in canonical form, so the text and integer columns always agree
+    start_date, end_date = from_day(start_day), from_day(end_day)
+
+    def submit(conn):
+        overlap = find_overlap(conn, emp_id, start_day, end_day)
+        if overlap is not None:
+            raise OverlappingLeave(overlap)
+
+        current_balance = get_balance(conn, emp_id)
+        if leave_days > current_balance:
+            raise InsufficientBalance(current_balance, leave_days)
+
+        new_balance = current_balance - leave_days
+        applied = datetime.date.today()
+        cursor = conn.execute('''
+            INSERT INTO leaves (employee_id, start_date, end_date, leave_days, remaining_days, reason, status, returned,
+                                applied_on, start_day, end_day, applied_day)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (emp_id, start_date, end_date, leave_days, new_balance, reason, 'Pending', 'No', applied.isoformat(),
+              start_day, end_day, to_day(applied)))
+        return dict(conn.execute(f'SELECT {LEAVE_SELECT} FROM leaves WHERE leave_id = ?', (cursor.lastrowid,)).fetchone())
+
+    return run_in_transaction(conn, submit)
+
+
+STATUS_CHOICES = ('Approved', 'Rejected')
+
+# Chunk size for IN (...) lists, well under SQLite's bound-parameter limit
+ID_CHUNK = 500
+
+
+def returned_for(status):
+    # Approved leave is active until the employee returns; a rejected one never started
+    return 'No' if status == 'Approved' else 'Yes'
+
+
+def owners(conn, leave_ids):
+    """Map leave_id -> employee_id for the given leaves."""
+    result = {}
+    ids = list(leave_ids)
+    for i in range(0, len(ids), ID_CHUNK):
+        chunk = ids[i:i + ID_CHUNK]
+        marks = ', '.join('?' * len(chunk))
+        result.update(conn.execute(f'SELECT leave_id, employee_id FROM leaves WHERE leave_id IN ({marks})', chunk).fetchall())
+    return result
+
+
+def set_status(conn, status, leave_ids=None, where=None, params=()):
+    """Apply a status/returned transition to many leaves in one transaction.
+
+    Targets either explicit leave_ids or every leave matching where/params (SQL
+    over leaves l JOIN employees e). Returns {leave_id: 'updated' | 'not_found'}.
+    """
+    if status not in STATUS_CHOICES:
+        raise LeaveError(f"status must be one of: {', '.join(STATUS_CHOICES)}")
+
+    def update(conn):
+        if leave_ids is not None:
+            found = set()
+            ids = list(dict.fromkeys(leave_ids))
+            for i in range(0, len(ids), ID_CHUNK):
+                chunk = ids[i:i + ID_CHUNK]
+                marks = ', '.join('?' * len(chunk))
+                found.update(row[0] for row in conn.execute(f'SELECT leave_id FROM leaves WHERE leave_id IN ({marks})', chunk))
+            targets = [leave_id for leave_id in ids if leave_id in found]
+        else:
+            sql = 'SELECT l.leave_id FROM leaves l JOIN employees e ON l.employee_id = e.id'
+            if where:
+                sql += ' WHERE ' + ' AND '.join(where)
+            ids = targets = [row[0] for row in conn.execute(sql + ' ORDER BY l.leave_id', params)]
+        conn.executemany('UPDATE leaves SET status = ?, returned = ? WHERE leave_id = ?',
+                         [(status, returned_for(status), leave_id) for leave_id in targets])
+        updated = set(targets)
+        return {leave_id: 'updated' if leave_id in updated else 'not_found' for leave_id in ids}
+
+    return run_in_transaction(conn, update)
+
+
+def overlapping_pairs(conn):
+    """Every pair of one employee's pending/approved leaves that share a day.
+
+    One sweep over the leaves in (employee_id, start_date) order, the order of
+    idx_leaves_employee_days. A heap holds the employee's leaves that are
+    still open, keyed by end_day. Each leave first drops those that ended
+    before it starts, then pairs with whatever remains. The cost is
+    O(n log n + pairs), not a comparison of every pair.
+    """
+    rows = conn.execute(f"""
+        SELECT l.leave_id, l.employee_id, e.name AS employee_name, l.start_date, l.end_date, l.start_day, l.end_day,
+               l.status
+        FROM leaves l
+        JOIN employees e ON e.id = l.employee_id
+        WHERE l.status IN ({', '.join('?' * len(ACTIVE_STATUSES))}) AND l.start_day IS NOT NULL
+        ORDER BY l.employee_id, l.start_day, l.leave_id
+    """, ACTIVE_STATUSES)
+
+    pairs = []
+    employee, open_leaves = None, []
+    for row in rows:
+        if row['employee_id'] != employee:
+            employee, open_leaves = row['employee_id'], []
+        while open_leaves and open_leaves[0][0] < row['start_day']:
+            heapq.heappop(open_leaves)
+        for end_day, _, other in open_leaves:
+            pairs.append({
+                'employee_id': employee,
+                'employee_name': row['employee_name'],
+                'overlap_start': from_day(row['start_day']),
+                'overlap_end': from_day(min(end_day, row['end_day'])),
+                'leaves': [{key: leave[key] for key in ('leave_id', 'start_date', 'end_date', 'status')}
+                           for leave in (other, row)],
+            })
+        heapq.heappush(open_leaves, (row['end_day'], row['leave_id'], row))
+    return pairs
@@ -0,0 +1,310 @@
+import contextvars
+import logging
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from flask.json.provider import DefaultJSONProvider
+
+import db
+from auth import token_cache
+from cache import report_cache
+from events import bus
+
+log = logging.getLogger('lms.sql')
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{str(value).replace(chr(34), chr(39))}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.labels, values)} {total}')
+        return lines
+
+
+class Histogram:
+    """Prometheus histogram with fixed buckets; one series per label tuple."""
+
+    def __init__(self, name, help, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket in zip(self.buckets, counts):
+                    cumulative += bucket
+                    lines.append(f'{self.name}_bucket{_labels(self.labels + ("le",), values + (bound,))} {cumulative}')
+                lines.append(f'{self.name}_bucket{_labels(self.labels + ("le",), values + ("+Inf",))} {count}')
+                lines.append(f'{self.name}_sum{_labels(self.labels, values)} {total}')
+                lines.append(f'{self.name}_count{_labels(self.labels, values)} {count}')
+        return lines
+
+
+REQUESTS = Counter('lms_http_requests_total', 'HTTP requests by route, method and status.', ('route', 'method', 'status'))
+LATENCY = Histogram('lms_http_request_seconds', 'Request latency.', LATENCY_BUCKETS, ('route', 'method'))
+DB_TIME = Histogram('lms_http_request_db_seconds', 'Time spent in SQLite per request (sampled).',
+                    LATENCY_BUCKETS, ('route',))
+SERIALIZE_TIME = Histogram('lms_http_request_serialize_seconds', 'Time spent encoding JSON per request (sampled).',
+                           LATENCY_BUCKETS, ('route',))
+ROWS = Histogram('lms_http_request_db_rows', 'Rows fetched from SQLite per request (sampled).', ROW_BUCKETS, ('route',))
+QUERIES = Counter('lms_db_queries_total', 'SQL statements executed in sampled requests.', ('route',))
+SLOW_QUERIES = Counter('lms_db_slow_queries_total', 'Statements slower than the slow-query threshold.', ('route',))
+
+REGISTRY = (REQUESTS, LATENCY, DB_TIME, SERIALIZE_TIME, ROWS, QUERIES, SLOW_QUERIES)
+
+
+class _RequestStats:
+    def __init__(self, route=None, method=None, profiling=False):
+        self.route = route
+        self.method = method
+        self.profiling = profiling
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.rows = 0
+        self.queries = 0
+
+
+# The current request's stats. A context variable rather than a thread local:
+# the async app runs handlers on worker threads (asyncio.to_thread copies the
+# context), and their queries still count towards the request.
+_IDLE = _RequestStats()
+_stats = contextvars.ContextVar('lms_request_stats', default=_IDLE)
+
+
+class Profiler:
+    """Settings and the slow-query log shared by the profiled connections."""
+
+    def __init__(self, sample_rate=1.0, slow_query_ms=200.0, keep=50):
+        self.sample_rate = sample_rate
+        self.slow_query_ms = slow_query_ms
+        self.slow = deque(maxlen=keep)
+
+    def slow_query(self, conn, sql, parameters, seconds):
+        statement = ' '.join(sql.split())
+        plan = None
+        if parameters is not None and re.match(r'(SELECT|WITH|UPDATE|DELETE|INSERT)\b', statement, re.I):
+            try:
+                rows = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, parameters).fetchall()
+                plan = [row[3] for row in rows]
+            except sqlite3.Error:
+                pass
+        route = _stats.get().route
+        entry = {'route': route, 'ms': round(seconds * 1000, 1), 'sql': statement, 'plan': plan,
+                 'at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        self.slow.append(entry)
+        SLOW_QUERIES.inc(route or '-')
+        log.warning('Slow query (%.1f ms) on %s: %s | plan: %s', entry['ms'], entry['route'], statement,
+                    '; '.join(plan or ()))
+
+
+profiler = Profiler()
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Times statements and counts fetched rows while the current request is sampled.
+
+    Time is attributed to the cursor's last statement across execute and the
+    fetches that follow it (SQLite does most of the work while stepping), and
+    the statement is logged once when it crosses the slow-query threshold.
+    """
+
+    def _track(self, sql, parameters):
+        self._sql = sql
+        self._parameters = parameters
+        self._elapsed = 0.0
+        self._logged = False
+        _stats.get().queries += 1
+
+    def _record(self, seconds, rows):
+        stats = _stats.get()
+        stats.db_time += seconds
+        stats.rows += rows
+        self._elapsed += seconds
+        if not self._logged and self._elapsed * 1000 >= profiler.slow_query_ms:
+            self._logged = True
+            profiler.slow_query(self.connection, self._sql, self._parameters, self._elapsed)
+
+    def execute(self, sql, parameters=()):
+        if not _stats.get().profiling:
+            return super().execute(sql, parameters)
+        self._track(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(time.perf_counter() - started, 0)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not _stats.get().profiling:
+            return super().executemany(sql, seq_of_parameters)
+        self._track(sql, None)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(time.perf_counter() - started, 0)
+
+    def fetchone(self):
+        if not _stats.get().profiling:
+            return super().fetchone()
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._record(time.perf_counter() - started, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        if not _stats.get().profiling:
+            return super().fetchmany(self.arraysize if size is None else size)
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._record(time.perf_counter() - started, len(rows))
+        return rows
+
+    def fetchall(self):
+        if not _stats.get().profiling:
+            return super().fetchall()
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._record(time.perf_counter() - started, len(rows))
+        return rows
+
+    def __next__(self):
+        if not _stats.get().profiling:
+            return super().__next__()
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        finally:
+            self._record(time.perf_counter() - started, 0)
+        _stats.get().rows += 1
+        return row
+
+
+class ProfiledConnection(sqlite3.Connection):
+    # Connection.execute does not go through cursor(), so both are routed here
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class ProfiledJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        if not _stats.get().profiling:
+            return super().dumps(obj, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            _stats.get().serialize_time += time.perf_counter() - started
+
+
+def start_request(route, method):
+    """Begin timing a request; the app's before-request hook calls this."""
+    _stats.set(_RequestStats(route, method, random.random() < profiler.sample_rate))
+
+
+def finish_request(status):
+    """Record the current request with its status; a no-op if it was already recorded.
+
+    Streaming bodies (export, SSE) are produced later; only their setup is measured.
+    """
+    stats = _stats.get()
+    if stats is _IDLE:
+        return
+    _stats.set(_IDLE)
+    REQUESTS.inc(stats.route, stats.method, status)
+    LATENCY.observe(time.perf_counter() - stats.started, stats.route, stats.method)
+    if stats.profiling:
+        DB_TIME.observe(stats.db_time, stats.route)
+        SERIALIZE_TIME.observe(stats.serialize_time, stats.route)
+        ROWS.observe(stats.rows, stats.route)
+        QUERIES.inc(stats.route, amount=stats.queries)
+
+
+def _gauges(prefix, stats):
+    lines = []
+    for key, value in sorted(stats.items()):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f'# TYPE {prefix}_{key} gauge')
+            lines.append(f'{prefix}_{key} {value}')
+    return lines
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(_gauges('lms_db_pool', db.pool.stats()))
+    lines.extend(_gauges('lms_auth_cache', token_cache.stats()))
+    lines.extend(_gauges('lms_report_cache', report_cache.stats()))
+    lines.extend(_gauges('lms_events', bus.stats()))
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app):
+    """Profile every pooled connection and time JSON encoding (per process).
+
+    METRICS_SAMPLE_RATE is the fraction of requests whose SQL and JSON time,
+    row counts and slow queries are recorded; latency and status counts are
+    recorded for every request. The apps call start_request() and
+    finish_request() from their request hooks and serve render() at /metrics
+    (api.prometheus_metrics).
+    """
+    profiler.sample_rate = app.config.get('METRICS_SAMPLE_RATE', 1.0)
+    profiler.slow_query_ms = app.config.get('METRICS_SLOW_QUERY_MS', 200.0)
+    db.pool.configure(factory=ProfiledConnection)
+    app.json = ProfiledJSONProvider(app)
+
+
+def slow_queries():
+    return list(profiler.slow)
@@ -0,0 +1,90 @@
+import datetime
+
+import accrual
+import auth
+import balances
+import cache
+import days
+import events
+import passwords
+import search
+import versions
+from db import connection
+
+# Each migration is (version, name, steps). A step is either an SQL statement
+# or a callable taking the connection. Versions are applied in order, each in
+# its own transaction, and recorded in schema_migrations.
+MIGRATIONS = [
+    (1, 'leaves covering indexes', (
+        # Latest balance: WHERE employee_id = ? ORDER BY leave_id DESC LIMIT 1
+        'CREATE INDEX IF NOT EXISTS idx_leaves_employee_leave ON leaves (employee_id, leave_id DESC, remaining_days)',
+        # Employee leave list: WHERE employee_id = ? ORDER BY applied_on DESC
+        'CREATE INDEX IF NOT EXISTS idx_leaves_employee_applied ON leaves (employee_id, applied_on)',
+        # Admin reports: status = ? AND returned = ? AND end_date < ?
+        'CREATE INDEX IF NOT EXISTS idx_leaves_status_returned_end ON leaves (status, returned, end_date)',
+    )),
+    (2, 'materialized balances', balances.SCHEMA + (balances.rebuild,)),
+    # Lets /api/login drop its plaintext comparison fallback
+    (3, 'rehash plaintext passwords', (passwords.rehash_plaintext,)),
+    (4, 'per-employee change versions', versions.SCHEMA),
+    # Integer day columns, with the date-range indexes (overlap checks, reports, calendar) on them
+    (5, 'leave day numbers', days.SCHEMA + (days.backfill,) + days.INDEXES),
+    (6, 'accrual adjustments and join dates', accrual.SCHEMA),
+    (7, 'employee full-text search', search.SCHEMA),
+    # Shared by every worker process, unlike the in-process token cache
+    (8, 'token revocations', auth.SCHEMA),
+    # Admin leave pages: WHERE l.status = ? AND l.leave_id > ? ORDER BY l.leave_id LIMIT ?
+    (9, 'leaves status keyset index', (
+        'CREATE INDEX IF NOT EXISTS idx_leaves_status_leave ON leaves (status, leave_id)',
+    )),
+    # Signals every worker process reads: the report cache version and the SSE event feed
+    (10, 'report version', cache.SCHEMA),
+    (11, 'event log', events.SCHEMA),
+]
+
+
+def current_version(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_on TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+    row = conn.execute('SELECT MAX(version) FROM schema_migrations').fetchone()
+    return row[0] or 0
+
+
+def migrate(conn, target=None):
+    """Apply every pending migration up to target (default: latest). Returns the applied versions."""
+    applied = []
+    version = current_version(conn)
+    for number, name, steps in MIGRATIONS:
+        if number <= version or (target is not None and number > target):
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute('INSERT INTO schema_migrations (version, name, applied_on) VALUES (?, ?, ?)',
+                         (number, name, datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(number)
+    return applied
+
+
+if __name__ == '__main__':
+    with connection() as conn:
+        before = current_version(conn)
+        applied = migrate(conn)
+        print(f"Schema version: {before} -> {current_version(conn)}")
+        for number, name, _ in MIGRATIONS:
+            if number in applied:
+                print(f"Applied {number}: {name}")
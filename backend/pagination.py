@@ -0,0 +1,109 @@
+import base64
+import datetime
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+PAGING_ARGS = ('limit', 'cursor')
+
+
+class QueryError(ValueError):
+    """Bad query-string parameter; routes turn it into a 400."""
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise QueryError('Invalid cursor')
+    if not isinstance(key, int):
+        raise QueryError('Invalid cursor')
+    return key
+
+
+def parse_limit(args):
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise QueryError('limit must be an integer')
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise QueryError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    return limit
+
+
+def parse_date(args, name):
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+    except (TypeError, ValueError):
+        raise QueryError(f'{name} must be a date in YYYY-MM-DD format')
+
+
+def is_paged(args):
+    """Requests without limit/cursor keep the original full-list response."""
+    return any(name in args for name in PAGING_ARGS)
+
+
+def parse_fields(args, columns, key):
+    """Map ?fields=a,b to SELECT expressions. columns maps public name -> SQL expression.
+
+    The key column is always selected because the cursor is built from it.
+    Returns None when no projection was requested.
+    """
+    requested = args.get('fields')
+    if not requested:
+        return None
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in names if name not in columns]
+    if unknown:
+        raise QueryError(f"Unknown fields: {', '.join(unknown)}")
+    names = [key] + [name for name in dict.fromkeys(names) if name != key]
+    return ', '.join(columns[name] for name in names)
+
+
+def page_query(select, source, where, params, key_column, args):
+    """Build a keyset-paginated query ordered by key_column ascending.
+
+    Returns (sql, params, limit); limit is None without limit/cursor in args,
+    and otherwise one extra row is requested to detect the last page.
+    """
+    where = list(where)
+    params = list(params)
+    if args.get('cursor'):
+        where.append(f'{key_column} > ?')
+        params.append(decode_cursor(args['cursor']))
+    sql = f"SELECT {select} FROM {source}"
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += f' ORDER BY {key_column}'
+    if not is_paged(args):
+        return sql, params, None
+
+    limit = parse_limit(args)
+    return sql + ' LIMIT ?', params + [limit + 1], limit
+
+
+def finish_page(rows, limit, key):
+    """Trim the extra row fetched by page_query; returns (rows, next_cursor)."""
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1][key])
+
+
+def fetch_page(conn, select, source, where, params, key, key_column, args):
+    """Run a keyset-paginated query ordered by key_column ascending.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page. Without
+    limit/cursor in args every matching row is returned.
+    """
+    sql, params, limit = page_query(select, source, where, params, key_column, args)
+    return finish_page(conn.execute(sql, params).fetchall(), limit, key)
@@ -0,0 +1,116 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from db import connection
+
+# Methods produced by werkzeug's generate_password_hash
+HASH_METHODS = ('scrypt', 'pbkdf2')
+
+
+class HasherBusy(Exception):
+    """Raised when every worker slot is taken and the wait timed out."""
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded thread pool.
+
+    hashlib releases the GIL while deriving scrypt/PBKDF2 keys, so the workers
+    hash in parallel. At most max_pending calls may be queued or running; the
+    rest wait up to timeout seconds for a slot and then raise HasherBusy, so a
+    login burst sheds load instead of piling up request threads.
+    """
+
+    def __init__(self, workers=None, max_pending=None, timeout=5.0):
+        self.workers = workers or os.cpu_count() or 2
+        self.max_pending = max_pending or self.workers * 8
+        self.timeout = timeout
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def configure(self, workers=None, max_pending=None, timeout=None):
+        self.shutdown()
+        if workers is not None:
+            self.workers = workers
+        if max_pending is not None:
+            self.max_pending = max_pending
+        if timeout is not None:
+            self.timeout = timeout
+
+    def _start(self):
+        with self._lock:
+            if self._executor is None:
+                self._slots = threading.BoundedSemaphore(self.max_pending)
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password')
+        return self._executor
+
+    def _run(self, fn, *args):
+        executor = self._executor or self._start()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HasherBusy('Too many concurrent password operations')
+        try:
+            return executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password)
+
+    def map_hash(self, passwords):
+        """Hash many passwords in parallel (batch jobs; not slot-limited)."""
+        executor = self._executor or self._start()
+        return list(executor.map(generate_password_hash, passwords))
+
+    def after_fork(self):
+        """Drop the parent's executor in a forked child; its threads do not exist there."""
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+hasher = PasswordHasher()
+
+
+def init_app(app):
+    hasher.configure(
+        workers=app.config.get('PASSWORD_WORKERS'),
+        max_pending=app.config.get('PASSWORD_MAX_PENDING'),
+        timeout=app.config.get('PASSWORD_QUEUE_TIMEOUT', 5.0),
+    )
+
+
+def is_hashed(value):
+    return value.count('$') >= 2 and value.split(':', 1)[0] in HASH_METHODS
+
+
+def rehash_plaintext(conn):
+    """Hash every plaintext password left in employee_users. Caller commits.
+
+    A database without employee_users (no logins yet) has nothing to rehash.
+    """
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'employee_users'").fetchone():
+        return 0
+    rows = [row for row in conn.execute('SELECT id, password FROM employee_users') if not is_hashed(row[1])]
+    hashes = hasher.map_hash([row[1] for row in rows])
+    conn.executemany('UPDATE employee_users SET password = ? WHERE id = ?',
+                     [(pwhash, row[0]) for pwhash, row in zip(hashes, rows)])
+    return len(rows)
+
+
+if __name__ == '__main__':
+    with connection() as conn:
+        count = rehash_plaintext(conn)
+        conn.commit()
+    print(f"Plaintext passwords rehashed: {count}")
@@ -0,0 +1,248 @@
+import datetime
+
+from days import from_day, to_day
+from filters import EMPLOYEE_SELECT, LEAVE_FIELDS, LEAVE_SELECT, select_list
+
+# Queries behind the admin reports. The Admin/ scripts print these lists in
+# full; /api/admin/summary returns the counts plus the first `top` rows.
+
+ON_LEAVE = "l.status = 'Approved' AND l.returned = 'No'"
+
+
+def today():
+    return datetime.date.today().isoformat()
+
+
+def _limit(sql, params, limit):
+    if limit is None:
+        return sql, params
+    return sql + ' LIMIT ?', params + (limit,)
+
+
+def all_employees(conn, limit=None):
+    """f1: every employee."""
+    sql, params = _limit('SELECT id, name, position, department, phone, email FROM employees ORDER BY id', (), limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def on_leave(conn, limit=None):
+    """f2/f11: approved leaves not yet returned, soonest expected return first."""
+    sql, params = _limit(f"""
+        SELECT e.id, e.name, e.position, e.department, e.phone, l.leave_id, l.start_date, l.end_date, l.applied_on, l.reason
+        FROM leaves l
+        JOIN employees e ON e.id = l.employee_id
+        WHERE {ON_LEAVE}
+        ORDER BY l.end_day
+    """, (), limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def present(conn, limit=None):
+    """f3: employees without an approved leave they have not returned from."""
+    sql, params = _limit(f"""
+        SELECT e.id, e.name, e.position, e.department, e.phone, e.email
+        FROM employees e
+        WHERE NOT EXISTS (SELECT 1 FROM leaves l WHERE l.employee_id = e.id AND {ON_LEAVE})
+        ORDER BY e.name
+    """, (), limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def overdue(conn, as_of=None, limit=None):
+    """f4: on leave past their end date, most overdue first."""
+    sql, params = _limit(f"""
+        SELECT e.id, e.name, e.position, e.department, e.phone, e.email, l.leave_id, l.reason, l.end_date
+        FROM leaves l
+        JOIN employees e ON e.id = l.employee_id
+        WHERE {ON_LEAVE} AND l.end_day < ?
+        ORDER BY l.end_day
+    """, (to_day(as_of or today()),), limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def pending(conn, limit=None):
+    """f9: pending requests, oldest application first."""
+    sql, params = _limit("""
+        SELECT e.id, e.name, e.position, e.department, e.phone, l.leave_id, l.leave_days, l.reason, l.status, l.applied_on
+        FROM leaves l
+        JOIN employees e ON e.id = l.employee_id
+        WHERE l.status = 'Pending'
+        ORDER BY l.applied_on
+    """, (), limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def leave_history(conn):
+    """f12: every leave with its employee, grouped by employee."""
+    return conn.execute("""
+        SELECT e.id, e.name, e.position, e.department, l.leave_id, l.reason, l.leave_days
+        FROM employees e
+        JOIN leaves l ON e.id = l.employee_id
+        ORDER BY e.id, l.start_date
+    """).fetchall()
+
+
+def leave_days_by_employee(conn, limit=None):
+    """f12 totals: leave count and days per employee, most days first."""
+    sql, params = _limit("""
+        SELECT e.id, e.name, e.department, COUNT(*) AS leaves, SUM(l.leave_days) AS leave_days
+        FROM leaves l
+        JOIN employees e ON e.id = l.employee_id
+        GROUP BY l.employee_id
+        ORDER BY leave_days DESC, e.id
+    """, (), limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def department_counts(conn, as_of=None):
+    """Per-department counts in one pass over employees LEFT JOIN leaves."""
+    return conn.execute(f"""
+        SELECT
+            e.department,
+            COUNT(DISTINCT e.id) AS employees,
+            COUNT(DISTINCT CASE WHEN {ON_LEAVE} THEN e.id END) AS on_leave,
+            COALESCE(SUM({ON_LEAVE}), 0) AS active_leaves,
+            COALESCE(SUM({ON_LEAVE} AND l.end_day < :today), 0) AS overdue,
+            COALESCE(SUM(l.status = 'Pending'), 0) AS pending,
+            COUNT(l.leave_id) AS leaves,
+            COALESCE(SUM(l.leave_days), 0) AS leave_days
+        FROM employees e
+        LEFT JOIN leaves l ON l.employee_id = e.id
+        GROUP BY e.department
+        ORDER BY e.department
+    """, {'today': to_day(as_of or today())}).fetchall()
+
+
+def summary(conn, as_of=None, top=10):
+    """All dashboard aggregates: totals, per-department counts and top-N lists."""
+    as_of = as_of or today()
+    departments = [dict(row) for row in department_counts(conn, as_of)]
+    totals = {key: sum(d[key] for d in departments)
+              for key in ('employees', 'on_leave', 'active_leaves', 'overdue', 'pending', 'leaves', 'leave_days')}
+    totals['present'] = totals['employees'] - totals['on_leave']
+    return {
+        'as_of': as_of,
+        'totals': totals,
+        'departments': departments,
+        'returns': [dict(row) for row in on_leave(conn, top)],
+        'overdue': [dict(row) for row in overdue(conn, as_of, top)],
+        'pending': [dict(row) for row in pending(conn, top)],
+        'top_leave_days': [dict(row) for row in leave_days_by_employee(conn, top)],
+    }
+
+
+def _department_filter(department):
+    return ('AND e.department = ?', (department,)) if department else ('', ())
+
+
+def calendar(conn, date_from, date_to, department=None):
+    """People on approved leave per department for each day of [date_from, date_to].
+
+    One pass over the approved leaves touching the range, in (employee_id,
+    start_date) order. Each employee's leaves are merged first, so someone
+    with overlapping leaves counts once per day. Then every merged stretch
+    adds +1 at its first day and -1 after its last in a per-department
+    difference array. A prefix sum gives the daily counts, so the cost is
+    O(leaves + days) however long the range is.
+    """
+    first, last = to_day(date_from), to_day(date_to)
+    days = last - first + 1
+    where, params = _department_filter(department)
+
+    headcount = dict(conn.execute(f"""
+        SELECT e.department, COUNT(*) FROM employees e WHERE 1 = 1 {where} GROUP BY e.department
+    """, params).fetchall())
+    diffs = {name: [0] * (days + 1) for name in headcount}
+
+    def add(name, start, end):
+        diffs[name][start] += 1
+        diffs[name][end + 1] -= 1
+
+    rows = conn.execute(f"""
+        SELECT l.employee_id, e.department, l.start_day, l.end_day
+        FROM leaves l
+        JOIN employees e ON e.id = l.employee_id
+        WHERE l.status = 'Approved' AND l.start_day <= ? AND l.end_day >= ? {where}
+        ORDER BY l.employee_id, l.start_day
+    """, (last, first) + params)
+
+    current = None  # [employee_id, department, start, end] of the stretch being merged
+    for emp_id, name, start_day, end_day in rows:
+        start, end = max(0, start_day - first), min(days - 1, end_day - first)
+        if current and current[0] == emp_id and start <= current[3] + 1:
+            current[3] = max(current[3], end)
+            continue
+        if current:
+            add(*current[1:])
+        current = [emp_id, name, start, end]
+    if current:
+        add(*current[1:])
+
+    departments = []
+    total = [0] * days
+    for name in sorted(diffs, key=lambda value: value or ''):
+        out, running = [], 0
+        for i in range(days):
+            running += diffs[name][i]
+            out.append(running)
+            total[i] += running
+        peak = max(range(days), key=out.__getitem__)
+        departments.append({'department': name, 'employees': headcount.get(name, 0), 'out': out,
+                            'peak': out[peak], 'peak_day': from_day(first + peak)})
+
+    return {
+        'from': date_from,
+        'to': date_to,
+        'department': department,
+        'days': [from_day(first + i) for i in range(days)],
+        'total': total,
+        'departments': departments,
+    }
+
+
+def absent_on(conn, day, department=None):
+    """The people behind one calendar day: approved leaves covering it, by department and name."""
+    where, params = _department_filter(department)
+    return conn.execute(f"""
+        SELECT e.id, e.name, e.position, e.department, l.leave_id, l.start_date, l.end_date, l.reason
+        FROM leaves l
+        JOIN employees e ON e.id = l.employee_id
+        WHERE l.status = 'Approved' AND l.start_day <= ? AND l.end_day >= ? {where}
+        GROUP BY e.id
+        ORDER BY e.department, e.name
+    """, (to_day(day), to_day(day)) + params).fetchall()
+
+
+def employee_details(conn, ids, history_limit=None):
+    """Employees with their leave histories (newest first) for many ids, in two queries.
+
+    One query loads the employees and one loads all of their leaves. With
+    history_limit, ROW_NUMBER() keeps only each employee's newest
+    history_limit leaves inside SQLite. The leaves are grouped onto their
+    employees in a single pass. Returns (details in the order of ids, ids
+    that were not found). ids must fit in one IN list (leaves.ID_CHUNK).
+    """
+    marks = ', '.join('?' * len(ids))
+    employees = {row['id']: dict(row, leave_history=[])
+                 for row in conn.execute(f'SELECT {EMPLOYEE_SELECT} FROM employees WHERE id IN ({marks})', ids)}
+
+    if history_limit is None:
+        leaves = conn.execute(f"""
+            SELECT {LEAVE_SELECT} FROM leaves WHERE employee_id IN ({marks}) ORDER BY employee_id, start_date DESC
+        """, ids)
+    else:
+        leaves = conn.execute(f"""
+            SELECT {LEAVE_SELECT} FROM (
+                SELECT {select_list(LEAVE_FIELDS, 'l')},
+                       ROW_NUMBER() OVER (PARTITION BY employee_id ORDER BY start_date DESC) AS history_rank
+                FROM leaves l WHERE employee_id IN ({marks})
+            )
+            WHERE history_rank <= ?
+            ORDER BY employee_id, history_rank
+        """, list(ids) + [history_limit])
+
+    for row in leaves:
+        employees[row['employee_id']]['leave_history'].append(dict(row))
+
+    found = [employees[emp_id] for emp_id in ids if emp_id in employees]
+    return found, [emp_id for emp_id in ids if emp_id not in employees]
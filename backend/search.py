@@ -0,0 +1,75 @@
+import re
+
+from filters import EMPLOYEE_FIELDS, select_list
+from pagination import QueryError
+
+# employees_fts is an FTS5 index over the searchable employee columns. It is
+# an external-content table: the text lives only in employees, and the
+# triggers below add, remove and re-add index entries in the same transaction
+# as the write. prefix='2 3' keeps extra indexes for two- and three-character
+# prefixes, so the short prefixes typed into a search box stay index lookups.
+COLUMNS = ('name', 'position', 'department', 'email', 'phone')
+
+# bm25 weight per column, in COLUMNS order: a name match ranks above a department match
+WEIGHTS = (10.0, 4.0, 2.0, 2.0, 1.0)
+
+# Terms beyond this are ignored, so one request cannot build an arbitrarily large query
+MAX_TERMS = 8
+
+_columns = ', '.join(COLUMNS)
+_new = ', '.join(f'NEW.{name}' for name in COLUMNS)
+_old = ', '.join(f'OLD.{name}' for name in COLUMNS)
+
+SCHEMA = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5(
+        {_columns}, content='employees', content_rowid='id', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fts_employee_insert AFTER INSERT ON employees
+    BEGIN
+        INSERT INTO employees_fts (rowid, {_columns}) VALUES (NEW.id, {_new});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fts_employee_delete AFTER DELETE ON employees
+    BEGIN
+        INSERT INTO employees_fts (employees_fts, rowid, {_columns}) VALUES ('delete', OLD.id, {_old});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fts_employee_update AFTER UPDATE OF {_columns} ON employees
+    BEGIN
+        INSERT INTO employees_fts (employees_fts, rowid, {_columns}) VALUES ('delete', OLD.id, {_old});
+        INSERT INTO employees_fts (rowid, {_columns}) VALUES (NEW.id, {_new});
+    END
+    """,
+    "INSERT INTO employees_fts (employees_fts) VALUES ('rebuild')",
+)
+
+
+def match_query(q):
+    """FTS5 MATCH expression for free text: every word must match as a prefix.
+
+    Words are split the way the unicode61 tokenizer splits them, so
+    'ali@company' searches for 'ali*' AND 'company*', and every term is
+    quoted, so FTS5 operators in user input are treated as plain text.
+    """
+    terms = re.findall(r'\w+', q or '')[:MAX_TERMS]
+    if not terms:
+        raise QueryError('q must contain at least one letter or digit')
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search(conn, q, limit, offset=0):
+    """Employees matching q, best match first (then by id), with their bm25 score (higher is better)."""
+    weights = ', '.join(str(weight) for weight in WEIGHTS)
+    return conn.execute(f"""
+        SELECT {select_list(EMPLOYEE_FIELDS, 'e')}, -bm25(employees_fts, {weights}) AS score
+        FROM employees_fts
+        JOIN employees e ON e.id = employees_fts.rowid
+        WHERE employees_fts MATCH ?
+        ORDER BY score DESC, e.id
+        LIMIT ? OFFSET ?
+    """, (match_query(q), limit, offset)).fetchall()
@@ -0,0 +1,133 @@
+"""Production launcher: server.app on pre-forked gunicorn workers.
+
+    python backend/serve.py --threads 32 --bind 0.0.0.0:5000 --pidfile /tmp/lms.pid
+
+The app is imported (and migrations run) once in the master, before forking,
+so workers share its memory copy-on-write. Database connections and the
+password hashing threads are never carried across the fork: the master
+releases its own before spawning and every worker opens fresh connections
+(WAL, busy_timeout, synchronous=NORMAL; see db.PRAGMAS) on first use.
+
+Signals to the master (pid in --pidfile):
+    HUP    graceful restart of every worker; in-flight requests finish first.
+           With the default --preload new workers fork from the loaded app,
+           so this does not pick up code changes; use --no-preload for that.
+    USR2   start a new master with fresh code alongside the old one, then
+           send QUIT to the old master once the new one is serving.
+    TERM   graceful shutdown.
+
+Workers share everything through the database, so any number of them serve
+the same state: token revocations are stored there, report caches are keyed
+on a version that triggers bump on every write (cache.py), and every SSE
+event is written to event_log, which a thread in each worker relays to its
+own streams (events.EventRelay, within SSE_RELAY_INTERVAL seconds). The
+default is one worker per CPU ($WEB_CONCURRENCY overrides it).
+
+An open /api/events stream holds a thread for as long as it is connected, so
+each worker accepts at most threads - max(2, threads // 4) of them (and no more
+than SSE_MAX_STREAMS); the remaining threads always serve ordinary requests.
+"""
+import argparse
+import os
+import sys
+
+from gunicorn.app.base import BaseApplication
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# Threads per worker kept free of /api/events streams: at least 2, or a quarter of the threads
+MIN_HEADROOM = 2
+
+
+# gunicorn's default format without the query string (%(U)s is the path alone):
+# EventSource clients send their token as /api/events?token=...
+ACCESS_LOG_FORMAT = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+
+
+def stream_cap(threads):
+    return max(1, threads - max(MIN_HEADROOM, threads // 4))
+
+
+def when_ready(arbiter):
+    # Runs in the master after the preloaded app is imported and before any fork
+    import db
+    import passwords
+    db.pool.close_all()
+    passwords.hasher.shutdown()
+
+
+def post_fork(arbiter, worker):
+    import db
+    import events
+    import passwords
+    db.pool.after_fork()
+    passwords.hasher.after_fork()
+    events.relay.after_fork()
+
+
+def worker_exit(arbiter, worker):
+    import db
+    db.pool.close_all()
+
+
+class Launcher(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        import db
+        import events
+        import server
+        threads = self.options['threads']
+        events.bus.max_streams = min(events.bus.max_streams, stream_cap(threads))
+        server.app.config['REQUEST_THREADS'] = threads
+        server.app.config['DB_POOL_SIZE'] = db.pool_size(threads)
+        db.pool.configure(size=server.app.config['DB_POOL_SIZE'])
+        return server.app
+
+
+def main():
+    default_workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--bind', default=os.environ.get('LMS_BIND', '0.0.0.0:5000'))
+    parser.add_argument('--workers', type=int, default=default_workers,
+                        help='worker processes (default: $WEB_CONCURRENCY or the CPU count)')
+    parser.add_argument('--threads', type=int, default=32,
+                        help='threads per worker; an open /api/events stream holds one')
+    parser.add_argument('--timeout', type=int, default=60, help='seconds before a silent worker is restarted')
+    parser.add_argument('--graceful-timeout', type=int, default=30,
+                        help='seconds workers get to finish requests on HUP/TERM')
+    parser.add_argument('--max-requests', type=int, default=0, help='recycle a worker after this many requests')
+    parser.add_argument('--pidfile')
+    parser.add_argument('--no-preload', dest='preload', action='store_false',
+                        help='import the app in each worker (HUP then reloads code)')
+    args = parser.parse_args()
+
+    Launcher({
+        'bind': args.bind,
+        'workers': args.workers,
+        'worker_class': 'gthread',
+        'threads': args.threads,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests // 10,
+        'pidfile': args.pidfile,
+        'preload_app': args.preload,
+        'chdir': BACKEND_DIR,
+        'when_ready': when_ready,
+        'post_fork': post_fork,
+        'worker_exit': worker_exit,
+        'accesslog': '-',
+        'access_log_format': ACCESS_LOG_FORMAT,
+    }).run()
+
+
+if __name__ == '__main__':
+    main()
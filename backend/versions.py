@@ -0,0 +1,38 @@
+# employees.version is a per-employee change counter. Triggers bump it whenever
+# the employee row or any of their leaves change, so it works as a strong ETag
+# for the employee's profile and leave list and can be read with a
+# primary-key lookup that never touches leaves.
+SCHEMA = (
+    'ALTER TABLE employees ADD COLUMN version INTEGER NOT NULL DEFAULT 0',
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_version_employee_update
+    AFTER UPDATE OF name, gender, age, position, department, phone, email, status ON employees
+    BEGIN
+        UPDATE employees SET version = version + 1 WHERE id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_version_leave_insert AFTER INSERT ON leaves
+    BEGIN
+        UPDATE employees SET version = version + 1 WHERE id = NEW.employee_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_version_leave_update AFTER UPDATE ON leaves
+    BEGIN
+        UPDATE employees SET version = version + 1 WHERE id IN (OLD.employee_id, NEW.employee_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_version_leave_delete AFTER DELETE ON leaves
+    BEGIN
+        UPDATE employees SET version = version + 1 WHERE id = OLD.employee_id;
+    END
+    """,
+)
+
+
+def employee_version(conn, emp_id):
+    """Current change version for an employee, or None if they do not exist."""
+    row = conn.execute('SELECT version FROM employees WHERE id = ?', (emp_id,)).fetchone()
+    return row[0] if row else None
@@ -0,0 +1,157 @@
+import os
+import sys
+
+import numpy as np
+
+from days import from_day, to_day
+
+# Working days are every day except the weekend days and the public holidays in
+# the holiday file. WorkdayCalendar precomputes a cumulative count of working
+# days over a fixed span, so the working days in any range is the difference
+# of two array entries, and many ranges can be counted in one vectorized step.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HOLIDAYS_PATH = os.environ.get('LMS_HOLIDAYS_PATH', os.path.join(BASE_DIR, 'holidays.txt'))
+WEEKEND = os.environ.get('LMS_WEEKEND', 'Sat,Sun')
+
+DAY_NAMES = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+# Day number 0 (1970-01-01) was a Thursday
+EPOCH_WEEKDAY = 3
+
+FIRST_DAY = to_day('1970-01-01')
+LAST_DAY = to_day('2199-12-31')
+
+
+def parse_weekend(value):
+    """'Sat,Sun' -> (5, 6)."""
+    names = [name.strip()[:3].title() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in DAY_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown weekend day(s): {', '.join(unknown)}")
+    return tuple(sorted({DAY_NAMES.index(name) for name in names}))
+
+
+def load_holidays(path, first_year=1970, last_year=2199):
+    """Day numbers of the holidays in path; a missing file means no holidays.
+
+    Each line is 'YYYY-MM-DD name' for a one-off date or 'MM-DD name' for a
+    date that recurs every year. Blank lines and '#' comments are ignored.
+    """
+    holidays = set()
+    if not os.path.exists(path):
+        return holidays
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            value = line.split('#', 1)[0].split(maxsplit=1)
+            if not value:
+                continue
+            date = value[0]
+            try:
+                if len(date) == 5:
+                    for year in range(first_year, last_year + 1):
+                        try:
+                            holidays.add(to_day(f'{year}-{date}'))
+                        except ValueError:
+                            if date != '02-29':
+                                raise
+                else:
+                    holidays.add(to_day(date))
+            except ValueError:
+                raise ValueError(f'{path}:{number}: expected YYYY-MM-DD or MM-DD, got {date!r}')
+    return holidays
+
+
+class WorkdayCalendar:
+    """Cumulative working-day counts for every day from 1970 to 2199.
+
+    cumulative[i] is the number of working days before day FIRST_DAY + i, so
+    count(start, end) is cumulative[end + 1] - cumulative[start]. The arrays
+    are replaced as a whole by configure(), so readers on other threads always
+    see a consistent calendar.
+    """
+
+    def __init__(self, weekend=(5, 6), holidays=()):
+        self.configure(weekend, holidays)
+
+    def configure(self, weekend=None, holidays=None):
+        weekend = self.weekend if weekend is None else tuple(weekend)
+        holidays = self.holidays if holidays is None else frozenset(holidays)
+        span = np.arange(FIRST_DAY, LAST_DAY + 1)
+        working = ~np.isin((span + EPOCH_WEEKDAY) % 7, weekend)
+        if holidays:
+            working &= ~np.isin(span, np.fromiter(holidays, dtype=np.int64))
+        cumulative = np.concatenate(([0], np.cumsum(working, dtype=np.int32)))
+        self.weekend, self.holidays, self.cumulative = weekend, holidays, cumulative
+
+    def _offsets(self, start, end):
+        if np.any(start < FIRST_DAY) or np.any(end > LAST_DAY):
+            raise ValueError(f'Dates must be between {from_day(FIRST_DAY)} and {from_day(LAST_DAY)}')
+        return start - FIRST_DAY, end - FIRST_DAY + 1
+
+    def count(self, start_day, end_day):
+        """Working days in [start_day, end_day] (day numbers, inclusive)."""
+        low, high = self._offsets(start_day, end_day)
+        return int(self.cumulative[high] - self.cumulative[low])
+
+    def count_many(self, start_days, end_days):
+        """count() for arrays of ranges in one vectorized step."""
+        low, high = self._offsets(np.asarray(start_days, dtype=np.int64), np.asarray(end_days, dtype=np.int64))
+        return self.cumulative[high] - self.cumulative[low]
+
+    def stats(self):
+        return {'weekend': [DAY_NAMES[day] for day in self.weekend], 'holidays': len(self.holidays),
+                'first': from_day(FIRST_DAY), 'last': from_day(LAST_DAY)}
+
+
+calendar = WorkdayCalendar(parse_weekend(WEEKEND), load_holidays(HOLIDAYS_PATH))
+
+
+def init_app(app):
+    calendar.configure(
+        weekend=parse_weekend(app.config.get('WEEKEND', WEEKEND)),
+        holidays=load_holidays(app.config.get('HOLIDAYS_PATH', HOLIDAYS_PATH)),
+    )
+
+
+def revalidate(conn, year):
+    """Leaves starting in year whose stored leave_days differ from the working-day count.
+
+    Reads the year's leaves once and counts every range in one vectorized
+    step. Returns a list of {leave_id, employee_id, ...} for the mismatches.
+    """
+    rows = conn.execute("""
+        SELECT leave_id, employee_id, start_day, end_day, leave_days, status FROM leaves
+        WHERE start_day >= ? AND start_day <= ? AND end_day IS NOT NULL
+        ORDER BY leave_id
+    """, (to_day(f'{year}-01-01'), to_day(f'{year}-12-31'))).fetchall()
+    if not rows:
+        return []
+    columns = np.array([(row[0], row[1], row[2], row[3], row[4] or 0) for row in rows], dtype=np.int64)
+    expected = calendar.count_many(columns[:, 2], columns[:, 3])
+    return [{
+        'leave_id': int(columns[i, 0]),
+        'employee_id': int(columns[i, 1]),
+        'start_date': from_day(int(columns[i, 2])),
+        'end_date': from_day(int(columns[i, 3])),
+        'status': rows[i][5],
+        'stored': int(columns[i, 4]),
+        'working_days': int(expected[i]),
+    } for i in np.flatnonzero(expected != columns[:, 4])]
+
+
+if __name__ == '__main__':
+    import datetime
+
+    from db import connection
+
+    year = int(sys.argv[1]) if len(sys.argv) > 1 else datetime.date.today().year
+    with connection() as conn:
+        mismatches = revalidate(conn, year)
+
+    print(f"Leaves starting in {year} charged differently from working days: {len(mismatches)}")
+    print("-" * 80)
+    for row in mismatches:
+        print(f"Leave ID: {row['leave_id']}, Employee ID: {row['employee_id']}, {row['start_date']} to {row['end_date']}, "
+              f"Status: {row['status']}, Charged: {row['stored']}, Working Days: {row['working_days']}")
+    if mismatches:
+        sys.exit(1)
@@ -4,6 +4,9 @@ import { LogOut, Users, FileText, Plus, CheckCircle, XCircle, UserCircle, Search
 import { motion, AnimatePresence } from 'framer-motion';
 
 const API_URL = 'http://localhost:5000/api';
+const PAGE_SIZE = 50;
+// Staff table columns plus what the edit form shows
+const STAFF_FIELDS = 'id,name,position,department,email,phone,status';
 
 interface AdminDashboardProps {
     user: { token: string; username: string; role: string };
@@ -12,10 +15,15 @@ interface AdminDashboardProps {
 
 const AdminDashboard: React.FC<AdminDashboardProps> = ({ user, onLogout }) => {
     const [employees, setEmployees] = useState<any[]>([]);
+    const [employeesCursor, setEmployeesCursor] = useState<string | null>(null);
     const [leaves, setLeaves] = useState<any[]>([]);
+    const [leavesCursor, setLeavesCursor] = useState<string | null>(null);
+    const [pendingLeaves, setPendingLeaves] = useState<any[]>([]);
+    const [activeLeaves, setActiveLeaves] = useState<any[]>([]);
     const [loading, setLoading] = useState(true);
     const [activeTab, setActiveTab] = useState<'dashboard' | 'employees' | 'leaves'>('dashboard');
     const [searchQuery, setSearchQuery] = useState('');
+    const [searchResults, setSearchResults] = useState<any[] | null>(null);
 
     // Modals
     const [editingEmployee, setEditingEmployee] = useState<any>(null);
@@ -47,33 +55,64 @@ const AdminDashboard: React.FC<AdminDashboardProps> = ({ user, onLogout }) => {
         fetchData();
     }, [activeTab]);
 
+    // Staff search runs server-side (ranked prefix matches), debounced while typing
+    useEffect(() => {
+        const q = searchQuery.trim();
+        if (activeTab !== 'employees' || !q) {
+            setSearchResults(null);
+            return;
+        }
+        // A newer query (or leaving the tab) cancels the request in flight, so an
+        // older, slower response can never replace newer results
+        const controller = new AbortController();
+        const timer = setTimeout(async () => {
+            try {
+                const headers = { Authorization: `Bearer ${user.token}` };
+                const res = await axios.get(`${API_URL}/admin/employees/search`, {
+                    headers, params: { q, limit: 100 }, signal: controller.signal
+                });
+                setSearchResults(res.data.items);
+            } catch (err) {
+                if (!axios.isCancel(err)) console.error('Error searching employees', err);
+            }
+        }, 250);
+        return () => {
+            clearTimeout(timer);
+            controller.abort();
+        };
+    }, [searchQuery, activeTab]);
+
+    // Each tab loads only what it shows; the staff directory and leave history are paged
     const fetchData = async () => {
         setLoading(true);
         try {
             const headers = { Authorization: `Bearer ${user.token}` };
-            const [empRes, leaveRes] = await Promise.all([
-                axios.get(`${API_URL}/admin/employees`, { headers }),
-                axios.get(`${API_URL}/admin/leaves`, { headers })
-            ]);
-
-            const allEmployees = empRes.data;
-            const allLeaves = leaveRes.data;
-
-            setEmployees(allEmployees);
-            setLeaves(allLeaves);
-
-            const total = allEmployees.length;
-            let onLeaveCount = 0;
-
-            allLeaves.forEach((l: any) => {
-                if (l.status === 'Approved' && l.returned === 'No') {
-                    onLeaveCount++;
-                }
-            });
-
-            const activeCount = total - onLeaveCount;
-            setStats({ total, active: activeCount, onLeave: onLeaveCount, pendingReturns: onLeaveCount });
-
+            if (activeTab === 'dashboard') {
+                const [summaryRes, activeRes] = await Promise.all([
+                    axios.get(`${API_URL}/admin/summary`, { headers, params: { top: 0 } }),
+                    axios.get(`${API_URL}/admin/leaves`, {
+                        headers, params: { status: 'Approved', returned: 'No', fields: 'leave_id,employee_name,end_date' }
+                    })
+                ]);
+                // Counts are aggregated server-side
+                const { totals } = summaryRes.data;
+                setStats({ total: totals.employees, active: totals.present, onLeave: totals.on_leave, pendingReturns: totals.active_leaves });
+                setActiveLeaves(activeRes.data);
+            } else if (activeTab === 'employees') {
+                const res = await axios.get(`${API_URL}/admin/employees`, {
+                    headers, params: { limit: PAGE_SIZE, fields: STAFF_FIELDS }
+                });
+                setEmployees(res.data.items);
+                setEmployeesCursor(res.data.next_cursor);
+            } else {
+                const [pendingRes, historyRes] = await Promise.all([
+                    axios.get(`${API_URL}/admin/leaves`, { headers, params: { status: 'Pending' } }),
+                    axios.get(`${API_URL}/admin/leaves`, { headers, params: { limit: PAGE_SIZE } })
+                ]);
+                setPendingLeaves(pendingRes.data);
+                setLeaves(historyRes.data.items);
+                setLeavesCursor(historyRes.data.next_cursor);
+            }
         } catch (err) {
             console.error('Error fetching data', err);
         } finally {
@@ -81,6 +120,30 @@ const AdminDashboard: React.FC<AdminDashboardProps> = ({ user, onLogout }) => {
         }
     };
 
+    const loadMoreEmployees = async () => {
+        try {
+            const headers = { Authorization: `Bearer ${user.token}` };
+            const res = await axios.get(`${API_URL}/admin/employees`, {
+                headers, params: { limit: PAGE_SIZE, cursor: employeesCursor, fields: STAFF_FIELDS }
+            });
+            setEmployees(prev => [...prev, ...res.data.items]);
+            setEmployeesCursor(res.data.next_cursor);
+        } catch (err) {
+            console.error('Error loading employees', err);
+        }
+    };
+
+    const loadMoreLeaves = async () => {
+        try {
+            const headers = { Authorization: `Bearer ${user.token}` };
+            const res = await axios.get(`${API_URL}/admin/leaves`, { headers, params: { limit: PAGE_SIZE, cursor: leavesCursor } });
+            setLeaves(prev => [...prev, ...res.data.items]);
+            setLeavesCursor(res.data.next_cursor);
+        } catch (err) {
+            console.error('Error loading leaves', err);
+        }
+    };
+
     const updateLeaveStatus = async (leaveId: number, status: 'Approved' | 'Rejected') => {
         try {
             const headers = { Authorization: `Bearer ${user.token}` };
@@ -142,22 +205,16 @@ const AdminDashboard: React.FC<AdminDashboardProps> = ({ user, onLogout }) => {
         }
     };
 
-    const filteredEmployees = employees.filter(emp =>
-        emp.name?.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        emp.position?.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        emp.department?.toLowerCase().includes(searchQuery.toLowerCase())
-    );
+    const filteredEmployees = searchQuery.trim() ? (searchResults ?? []) : employees;
 
-    const filteredLeaves = leaves.filter(leave =>
+    const matchesSearch = (leave: any) =>
         leave.employee_name?.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        leave.status?.toLowerCase().includes(searchQuery.toLowerCase())
-    );
+        leave.status?.toLowerCase().includes(searchQuery.toLowerCase());
 
-    const pendingReturns = leaves.filter(l => {
-        return l.status === 'Approved' && l.returned === 'No';
-    });
+    const filteredPending = pendingLeaves.filter(matchesSearch);
 
-    const activeLeaves = leaves.filter(l => l.status === 'Approved' && l.returned === 'No');
+    // Pending leaves are listed in full above; the history pages skip them
+    const filteredHistory = leaves.filter(l => l.status !== 'Pending' && matchesSearch(l));
 
     return (
         <div className="h-screen flex items-center justify-center relative overflow-hidden" style={{
@@ -323,8 +380,8 @@ const AdminDashboard: React.FC<AdminDashboardProps> = ({ user, onLogout }) => {
                                                 <h3 className="text-xl font-bold text-slate-800 mb-6 flex items-center gap-2">
                                                     <Clock className="text-amber-500" /> Expected Returns
                                                 </h3>
-                                                {pendingReturns.length ? (
-                                                    <div className="space-y-4">{pendingReturns.map(l => (
+                                                {activeLeaves.length ? (
+                                                    <div className="space-y-4">{activeLeaves.map(l => (
                                                         <div key={l.leave_id} className="flex justify-between p-4 bg-white rounded-xl border border-amber-100 shadow-sm">
                                                             <div>
                                                                 <p className="font-bold">{l.employee_name}</p>
@@ -482,6 +539,13 @@ const AdminDashboard: React.FC<AdminDashboardProps> = ({ user, onLogout }) => {
                                                 </tbody>
                                             </table>
                                         </div>
+                                        {!searchQuery.trim() && employeesCursor && (
+                                            <div className="flex justify-center mt-6">
+                                                <button onClick={loadMoreEmployees} className="btn" style={{ padding: '0.75rem 1.5rem', borderRadius: '12px', fontWeight: '600', cursor: 'pointer' }}>
+                                                    Load more
+                                                </button>
+                                            </div>
+                                        )}
                                     </div>
                                 )}
 
@@ -501,7 +565,7 @@ const AdminDashboard: React.FC<AdminDashboardProps> = ({ user, onLogout }) => {
                                                         </tr>
                                                     </thead>
                                                     <tbody>
-                                                        {filteredLeaves.filter(l => l.status === 'Pending').map(l => (
+                                                        {filteredPending.map(l => (
                                                             <tr key={l.leave_id}>
                                                                 <td className="font-bold">{l.employee_name}</td>
                                                                 <td>{l.reason}</td>
@@ -545,7 +609,7 @@ const AdminDashboard: React.FC<AdminDashboardProps> = ({ user, onLogout }) => {
                                                                 </td>
                                                             </tr>
                                                         ))}
-                                                        {!filteredLeaves.some(l => l.status === 'Pending') && (
+                                                        {!filteredPending.length && (
                                                             <tr>
                                                                 <td colSpan={5} className="text-center text-slate-400 py-8">No pending requests</td>
                                                             </tr>
@@ -568,7 +632,7 @@ const AdminDashboard: React.FC<AdminDashboardProps> = ({ user, onLogout }) => {
                                                         </tr>
                                                     </thead>
                                                     <tbody>
-                                                        {filteredLeaves.filter(l => l.status !== 'Pending').map(l => (
+                                                        {filteredHistory.map(l => (
                                                             <tr key={l.leave_id}>
                                                                 <td>{l.employee_name}</td>
                                                                 <td className="text-sm">{l.start_date} → {l.end_date}</td>
@@ -587,6 +651,13 @@ const AdminDashboard: React.FC<AdminDashboardProps> = ({ user, onLogout }) => {
                                                     </tbody>
                                                 </table>
                                             </div>
+                                            {leavesCursor && (
+                                                <div className="flex justify-center mt-6">
+                                                    <button onClick={loadMoreLeaves} className="btn" style={{ padding: '0.75rem 1.5rem', borderRadius: '12px', fontWeight: '600', cursor: 'pointer' }}>
+                                                        Load more
+                                                    </button>
+                                                </div>
+                                            )}
                                         </div>
                                     </div>
                                 )}
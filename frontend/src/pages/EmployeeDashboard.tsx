@@ -23,9 +23,29 @@ const EmployeeDashboard: React.FC<EmployeeDashboardProps> = ({ user, onLogout })
     const [actionLoading, setActionLoading] = useState(false);
     const [msg, setMsg] = useState('');
 
+    const [refresh, setRefresh] = useState(0);
+
     useEffect(() => {
         fetchData();
-    }, [activeTab]);
+    }, [activeTab, refresh]);
+
+    // Live updates: the server pushes leave changes, so the history and balance
+    // are patched in place instead of being refetched.
+    useEffect(() => {
+        const source = new EventSource(`${API_URL}/events?token=${encodeURIComponent(user.token)}`);
+        source.addEventListener('leave_status', (e) => {
+            const change = JSON.parse((e as MessageEvent).data);
+            setLeaves(prev => prev.map(l => l.leave_id === change.leave_id ? { ...l, status: change.status, returned: change.returned } : l));
+        });
+        source.addEventListener('leave_applied', (e) => {
+            const leave = JSON.parse((e as MessageEvent).data);
+            setLeaves(prev => prev.some(l => l.leave_id === leave.leave_id) ? prev : [leave, ...prev]);
+            setProfile((prev: any) => prev && { ...prev, leave_balance: leave.remaining_days });
+        });
+        // Sent when this client fell behind and events were dropped
+        source.addEventListener('resync', () => setRefresh(n => n + 1));
+        return () => source.close();
+    }, [user.token]);
 
     const fetchData = async () => {
         setLoading(true);
@@ -50,16 +70,10 @@ const EmployeeDashboard: React.FC<EmployeeDashboardProps> = ({ user, onLogout })
         setActionLoading(true);
         setMsg('');
         try {
-            const start = new Date(startDate);
-            const end = new Date(endDate);
-            const diffTime = Math.abs(end.getTime() - start.getTime());
-            const diffDays = Math.ceil(diffTime / (1000 * 60 * 60 * 24)) + 1;
-
             const headers = { Authorization: `Bearer ${user.token}` };
             const res = await axios.post(`${API_URL}/employee/leaves`, {
                 start_date: startDate,
                 end_date: endDate,
-                leave_days: diffDays,
                 reason
             }, { headers });
 